@@ -1,19 +1,107 @@
-from flask import Flask, render_template, request, send_from_directory, abort, jsonify
+from flask import Flask, render_template, request, send_from_directory, abort, jsonify, g
 import os
-import subprocess
-import shlex
-import csv
+import bisect
+import hashlib
+import io
+import json
 import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+from PIL import Image
+from werkzeug.utils import safe_join
+
+from catalog import load_catalog
+from label_store import LabelStore, label_filename_sku
+from label_templates import template_output_dirs
+from metrics import LatencyHistogram
+from main import (
+    THUMBNAIL_FORMAT, encode_label_thumbnail, get_default_renderer, label_thumbnail_path,
+    render_label_image, render_label_png,
+)
+from print_queue import PrintQueue, backend_from_env
 
 app = Flask(__name__)
+# Let a fronting web server (Apache/lighttpd X-Sendfile) send label files itself
+app.config['USE_X_SENDFILE'] = os.environ.get('BARCODE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
 
 # Set the root directory where barcode images are stored (category folders)
 BARCODE_ROOT = os.path.dirname(os.path.abspath(__file__))
 ITEMS_CSV = os.path.join(BARCODE_ROOT, 'items.csv')
 
-SKU_TO_IMAGE_PATH = {}
-NAME_TO_SKUS = {}
-SEARCHABLE_ITEMS = []
+# Directories under BARCODE_ROOT that never hold standard barcode labels
+SKIP_DIRS = {'templates', 'install', 'benchmarks', '.git', '__pycache__'} | template_output_dirs()
+
+# Single-file label store written by `main.py --store`; when set, labels are
+# served from it instead of the category folders under BARCODE_ROOT
+LABEL_STORE_PATH = os.environ.get('BARCODE_LABEL_STORE') or None
+LABEL_STORE = LabelStore(LABEL_STORE_PATH, readonly=True) if LABEL_STORE_PATH else None
+
+# Longest n-gram stored in the name index; shorter grams are stored too so
+# one- and two-character queries can be answered from the index as well
+NAME_GRAM_SIZE = 3
+
+# Seconds between checks for new labels or a changed items.csv (0 disables)
+INDEX_REFRESH_SECONDS = float(os.environ.get('BARCODE_INDEX_REFRESH_SECONDS', '5'))
+
+# Upper bound on the memory used by on-demand rendered labels
+LABEL_CACHE_BYTES = int(os.environ.get('BARCODE_LABEL_CACHE_BYTES', str(32 * 1024 * 1024)))
+
+# Labels queued within this many seconds are printed on the same sheet run
+PRINT_COALESCE_SECONDS = float(os.environ.get('BARCODE_PRINT_COALESCE_SECONDS', '2'))
+MAX_PRINT_QUANTITY = 1000
+
+# Cache lifetime of label image URLs carrying a ?v= version token; the token
+# changes whenever the label does, so browsers never need to revalidate them
+VERSIONED_LABEL_MAX_AGE = 365 * 24 * 3600
+
+# Cache lifetime of thumbnail URLs without a version token; a slightly stale
+# preview is harmless, so they are cached longer than unversioned labels
+THUMBNAIL_MAX_AGE = 600
+THUMBNAIL_MIMETYPE = 'image/' + THUMBNAIL_FORMAT.lower()
+
+# Every index a request needs, bundled so a refresh can swap them all in one
+# assignment. Requests read SEARCH_INDEX once and use that snapshot throughout,
+# so they never see a half-updated index.
+SearchIndex = namedtuple('SearchIndex', [
+    'sku_to_image_path',  # SKU -> label path relative to BARCODE_ROOT
+    'name_to_skus',       # normalized name -> [SKU, ...]
+    'searchable_items',   # [(normalized name, SKU, display name)] sorted by display name
+    'name_gram_index',    # n-gram -> {position in searchable_items}
+    'sku_to_name',        # SKU -> display name
+    'barcode_to_sku',     # barcode number (also without leading zeros) -> SKU
+    'sku_to_label',       # SKU -> (barcode number, price, name) for on-demand rendering
+    'category_items',     # category -> [{'sku', 'name'}] sorted by name
+    'sorted_skus',        # SKUs that have or can render a label, sorted for prefix lookups
+    'folder_skus',        # label folder (or the label store) -> {SKU: label path}
+    'folder_mtimes',      # label folder (or the label store) -> mtime when it was scanned
+    'csv_signature',      # (mtime, size) of items.csv when it was parsed
+])
+
+# Fields of SearchIndex that are built from items.csv
+CSV_INDEX_FIELDS = (
+    'name_to_skus', 'searchable_items', 'name_gram_index', 'sku_to_name',
+    'barcode_to_sku', 'sku_to_label', 'category_items',
+)
+
+SEARCH_INDEX = SearchIndex({}, {}, [], {}, {}, {}, {}, {}, [], {}, {}, None)
+
+# Rebuild timings reported by /metrics
+INDEX_REFRESH_STATS = {
+    'rebuilds': 0,
+    'last_seconds': None,
+    'max_seconds': 0.0,
+    'last_rebuilt_at': None,
+    'last_rebuild_csv': None,
+}
+_index_refresh_lock = threading.Lock()
+
+# Per-endpoint request latency reported by /metrics
+REQUEST_LATENCY = {}
+_request_latency_lock = threading.Lock()
+_refresher_thread = None
 
 
 def normalize_text(text):
@@ -21,15 +109,39 @@ def normalize_text(text):
     return ' '.join(cleaned.split())
 
 
-def build_barcode_index():
+def list_label_folders():
+    """Return BARCODE_ROOT and every top-level folder that may hold labels.
+
+    With a label store configured, the store file is the only "folder".
+    """
+    if LABEL_STORE is not None:
+        return [LABEL_STORE_PATH] if os.path.exists(LABEL_STORE_PATH) else []
+    folders = [BARCODE_ROOT]
+    for entry in os.scandir(BARCODE_ROOT):
+        if entry.is_dir() and entry.name not in SKIP_DIRS and not entry.name.startswith('.'):
+            folders.append(entry.path)
+    return folders
+
+
+def scan_label_folder(folder):
+    """Map SKU to relative label path for the PNGs in one folder.
+
+    BARCODE_ROOT itself is only scanned at the top level; category folders
+    are scanned recursively. The label store is read from its index instead.
+    """
+    if LABEL_STORE is not None and folder == LABEL_STORE_PATH:
+        return LABEL_STORE.sku_index()
     sku_index = {}
-    skip_dirs = {'templates', 'install', '.git', '__pycache__'}
-    for root, dirs, files in os.walk(BARCODE_ROOT):
-        dirs[:] = [directory for directory in dirs if directory not in skip_dirs]
+    for root, dirs, files in os.walk(folder):
+        if folder == BARCODE_ROOT:
+            dirs[:] = []
+        else:
+            dirs[:] = [directory for directory in dirs
+                       if directory not in SKIP_DIRS and not directory.startswith('.')]
         for file_name in files:
             if not file_name.endswith('.png') or '-' not in file_name:
                 continue
-            sku = file_name.split('-', 1)[0].strip()
+            sku = label_filename_sku(file_name)
             if not sku:
                 continue
             abs_path = os.path.join(root, file_name)
@@ -38,86 +150,505 @@ def build_barcode_index():
     return sku_index
 
 
+def merge_folder_skus(folder_skus):
+    """Combine per-folder SKU maps into one, in a stable folder order."""
+    sku_index = {}
+    for folder in sorted(folder_skus):
+        sku_index.update(folder_skus[folder])
+    return sku_index
+
+
+def build_barcode_index():
+    return merge_folder_skus({folder: scan_label_folder(folder) for folder in list_label_folders()})
+
+
+def file_signature(path):
+    """Return (mtime, size) of path, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
 def build_name_index():
+    """Build every index that comes from items.csv.
+
+    Returns:
+        dict: The CSV_INDEX_FIELDS of a SearchIndex
+    """
     name_to_skus = {}
     searchable_items = []
+    barcode_to_sku = {}
+    sku_to_label = {}
+    category_items = {}
+
+    items = load_catalog(ITEMS_CSV) if os.path.exists(ITEMS_CSV) else []
+    for item in items:
+        sku = item.sku
+        name = item.name
+        if sku and item.barcode:
+            barcode_to_sku[item.barcode] = sku
+            # Scanners may add or drop leading zeros (UPC-A vs EAN-13)
+            if item.barcode.lstrip('0'):
+                barcode_to_sku.setdefault(item.barcode.lstrip('0'), sku)
+            sku_to_label[sku] = (item.barcode, item.price, name)
+        if not sku or not name:
+            continue
+
+        normalized_name = normalize_text(name)
+        if not normalized_name:
+            continue
 
-    if not os.path.exists(ITEMS_CSV):
-        return name_to_skus, searchable_items
+        if normalized_name not in name_to_skus:
+            name_to_skus[normalized_name] = []
+        name_to_skus[normalized_name].append(sku)
+        searchable_items.append((normalized_name, sku, name))
+        category_items.setdefault(item.category or 'Uncategorized', []).append({'sku': sku, 'name': name})
+
+    # Keep items sorted by display name so matches come out pre-sorted
+    searchable_items.sort(key=lambda item: item[2])
+    for listing in category_items.values():
+        listing.sort(key=lambda item: item['name'])
+
+    return {
+        'name_to_skus': name_to_skus,
+        'searchable_items': searchable_items,
+        'name_gram_index': build_gram_index(searchable_items),
+        'sku_to_name': {sku: display_name for _, sku, display_name in reversed(searchable_items)},
+        'barcode_to_sku': barcode_to_sku,
+        'sku_to_label': sku_to_label,
+        'category_items': category_items,
+    }
+
+
+def name_grams(text, size=NAME_GRAM_SIZE):
+    """Return the set of size-character substrings of text (or text itself when shorter)."""
+    size = min(size, len(text))
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def build_gram_index(searchable_items):
+    """Map every 1..NAME_GRAM_SIZE character substring of a name to the positions of the items containing it."""
+    gram_index = {}
+    for position, (normalized_name, _, _) in enumerate(searchable_items):
+        for size in range(1, NAME_GRAM_SIZE + 1):
+            for gram in name_grams(normalized_name, size):
+                postings = gram_index.get(gram)
+                if postings is None:
+                    gram_index[gram] = postings = set()
+                postings.add(position)
+    return gram_index
+
+
+def candidate_positions(fragments, gram_index):
+    """Intersect the posting lists of every n-gram in fragments.
+
+    Returns a set of item positions that may match, or None when there is
+    nothing to narrow down by (every item is a candidate).
+    """
+    postings = []
+    for fragment in fragments:
+        for gram in name_grams(fragment):
+            posting = gram_index.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+    if not postings:
+        return None
+
+    postings.sort(key=len)
+    candidates = set(postings[0])
+    for posting in postings[1:]:
+        candidates &= posting
+        if not candidates:
+            break
+    return candidates
 
-    with open(ITEMS_CSV, 'r', encoding='utf-8') as csv_file:
-        reader = csv.DictReader(csv_file)
-        for row in reader:
-            sku = (row.get('SKU') or '').strip()
-            name = (row.get('Name') or '').strip()
-            if not sku or not name:
-                continue
 
-            normalized_name = normalize_text(name)
-            if not normalized_name:
-                continue
+@lru_cache(maxsize=256)
+def compile_wildcard(fragments):
+    """Compile a wildcard query, given as its normalized '*'-separated fragments."""
+    return re.compile('^' + '.*'.join(re.escape(fragment) for fragment in fragments) + '$')
+
 
-            if normalized_name not in name_to_skus:
-                name_to_skus[normalized_name] = []
-            name_to_skus[normalized_name].append(sku)
-            searchable_items.append((normalized_name, sku, name))
+def refresh_indexes(force=False):
+    """Bring SEARCH_INDEX up to date with the label folders and items.csv.
 
-    return name_to_skus, searchable_items
+    Only folders whose mtime changed since the last scan are rescanned, and
+    items.csv is only re-parsed when its mtime or size changed. The new
+    indexes are built aside and swapped in with a single assignment.
+
+    Args:
+        force (bool): Rescan every folder and re-parse items.csv
+
+    Returns:
+        bool: True if anything changed
+    """
+    global SEARCH_INDEX
+    started = time.perf_counter()
+    current = SEARCH_INDEX
+
+    folder_mtimes = {}
+    for folder in list_label_folders():
+        signature = file_signature(folder)
+        if signature:
+            folder_mtimes[folder] = signature[0]
+
+    folders_changed = force or folder_mtimes.keys() != current.folder_mtimes.keys()
+    folder_skus = {}
+    for folder, mtime in folder_mtimes.items():
+        if not force and current.folder_mtimes.get(folder) == mtime:
+            folder_skus[folder] = current.folder_skus[folder]
+        else:
+            folder_skus[folder] = scan_label_folder(folder)
+            folders_changed = True
+
+    csv_signature = file_signature(ITEMS_CSV)
+    csv_changed = force or csv_signature != current.csv_signature
+
+    if not folders_changed and not csv_changed:
+        return False
+
+    sku_index = merge_folder_skus(folder_skus) if folders_changed else current.sku_to_image_path
+
+    if csv_changed:
+        csv_indexes = build_name_index()
+    else:
+        csv_indexes = {field: getattr(current, field) for field in CSV_INDEX_FIELDS}
+
+    SEARCH_INDEX = SearchIndex(
+        sku_to_image_path=sku_index,
+        sorted_skus=sorted(sku_index.keys() | csv_indexes['sku_to_label'].keys()),
+        folder_skus=folder_skus,
+        folder_mtimes=folder_mtimes,
+        csv_signature=csv_signature,
+        **csv_indexes
+    )
+
+    seconds = time.perf_counter() - started
+    with _index_refresh_lock:
+        INDEX_REFRESH_STATS['rebuilds'] += 1
+        INDEX_REFRESH_STATS['last_seconds'] = round(seconds, 4)
+        INDEX_REFRESH_STATS['max_seconds'] = round(max(INDEX_REFRESH_STATS['max_seconds'], seconds), 4)
+        INDEX_REFRESH_STATS['last_rebuilt_at'] = time.time()
+        INDEX_REFRESH_STATS['last_rebuild_csv'] = csv_changed
+    return True
 
 
 def rebuild_indexes():
-    sku_index = build_barcode_index()
-    name_to_skus, searchable_items = build_name_index()
+    refresh_indexes(force=True)
+
+
+def start_index_refresher(interval=INDEX_REFRESH_SECONDS):
+    """Poll for new labels and a changed items.csv in a background thread.
 
-    SKU_TO_IMAGE_PATH.clear()
-    SKU_TO_IMAGE_PATH.update(sku_index)
-    NAME_TO_SKUS.clear()
-    NAME_TO_SKUS.update(name_to_skus)
-    SEARCHABLE_ITEMS.clear()
-    SEARCHABLE_ITEMS.extend(searchable_items)
+    Threads do not survive a fork, so a pre-forking server has to call this
+    in every worker (see gunicorn.conf.py) rather than once at import.
+    """
+    global _refresher_thread
+    if interval <= 0 or (_refresher_thread is not None and _refresher_thread.is_alive()):
+        return
 
+    def refresh_forever():
+        while True:
+            time.sleep(interval)
+            try:
+                if refresh_indexes():
+                    app.logger.info('Barcode indexes refreshed')
+            except Exception:
+                app.logger.exception('Failed to refresh barcode indexes')
 
-def find_name_matches(name_query, max_results=100):
+    _refresher_thread = threading.Thread(target=refresh_forever, name='index-refresher', daemon=True)
+    _refresher_thread.start()
+
+
+def find_name_matches(name_query, max_results=100, index=None):
+    index = index or SEARCH_INDEX
     normalized_query = normalize_text(name_query)
     if not normalized_query:
         return []
 
     use_wildcard = '*' in name_query
-    wildcard_pattern = ''
     if use_wildcard:
-        wildcard_pattern = '^' + re.escape(normalized_query).replace('\\*', '.*') + '$'
+        fragments = tuple(normalize_text(fragment) for fragment in name_query.split('*'))
+        pattern = compile_wildcard(fragments)
+        candidates = candidate_positions([fragment for fragment in fragments if fragment], index.name_gram_index)
+    else:
+        candidates = candidate_positions([normalized_query], index.name_gram_index)
 
-    matched_items = []
-    for normalized_name, sku, display_name in SEARCHABLE_ITEMS:
-        if sku not in SKU_TO_IMAGE_PATH:
+    searchable_items = index.searchable_items
+    sku_to_image_path = index.sku_to_image_path
+    sku_to_label = index.sku_to_label
+    positions = range(len(searchable_items)) if candidates is None else sorted(candidates)
+
+    unique_matches = []
+    seen_skus = set()
+    for position in positions:
+        normalized_name, sku, display_name = searchable_items[position]
+        if sku in seen_skus or (sku not in sku_to_image_path and sku not in sku_to_label):
             continue
 
-        is_match = False
         if use_wildcard:
-            is_match = re.search(wildcard_pattern, normalized_name) is not None
+            is_match = pattern.match(normalized_name) is not None
         else:
             is_match = normalized_query in normalized_name
 
         if is_match:
-            matched_items.append({'sku': sku, 'name': display_name})
+            seen_skus.add(sku)
+            unique_matches.append({'sku': sku, 'name': display_name})
+            if len(unique_matches) >= max_results:
+                break
 
-    unique_matches = []
+    return unique_matches
+
+
+def find_sku_prefix_matches(prefix, max_results=100, index=None):
+    """Return labelled items whose SKU starts with prefix, in SKU order."""
+    index = index or SEARCH_INDEX
+    sorted_skus = index.sorted_skus
+    matches = []
+    position = bisect.bisect_left(sorted_skus, prefix)
+    while position < len(sorted_skus) and len(matches) < max_results:
+        sku = sorted_skus[position]
+        if not sku.startswith(prefix):
+            break
+        matches.append({'sku': sku, 'name': index.sku_to_name.get(sku, '')})
+        position += 1
+    return matches
+
+
+class LabelCache:
+    """Thread-safe LRU of rendered label PNGs, bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return data
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._entries[key] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+
+LABEL_CACHE = LabelCache(LABEL_CACHE_BYTES)
+_render_lock = threading.Lock()
+
+
+def label_etag(sku, label):
+    """Strong ETag for an on-demand label: changes whenever its row or the renderer settings do."""
+    payload = json.dumps([sku, list(label), get_default_renderer().options_key()], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def find_sku_by_barcode(barcode_number, index=None):
+    """Resolve a scanned barcode number to its SKU with a single dict lookup."""
+    index = index or SEARCH_INDEX
+    barcode_number = barcode_number.strip()
+    if not barcode_number:
+        return None
+    return index.barcode_to_sku.get(barcode_number) or index.barcode_to_sku.get(barcode_number.lstrip('0'))
+
+
+def list_category_items(category, index=None):
+    """Return the items of a category that have a label, sorted by name."""
+    index = index or SEARCH_INDEX
+    return [
+        item for item in index.category_items.get(category, [])
+        if item['sku'] in index.sku_to_image_path or item['sku'] in index.sku_to_label
+    ]
+
+
+def print_label_source(sku):
+    """Return the (key, source) pair the print queue places on sheets for sku."""
+    index = SEARCH_INDEX
+    rel_image_path = index.sku_to_image_path.get(sku)
+    if rel_image_path:
+        if LABEL_STORE is None:
+            return sku, os.path.join(BARCODE_ROOT, rel_image_path)
+        png = LABEL_STORE.get(rel_image_path)
+        if png is not None:
+            return sku, io.BytesIO(png)
+    label = index.sku_to_label.get(sku)
+    if label:
+        with _render_lock:
+            return sku, render_label_image(*label)
+    return None
+
+
+PRINT_QUEUE = PrintQueue(backend_from_env(), print_label_source, coalesce_seconds=PRINT_COALESCE_SECONDS)
+
+
+def label_version(rel_image_path, index=None):
+    """Return a token that changes whenever the label file changes, or None.
+
+    Files are versioned by their own mtime; labels in a label store by the
+    store's mtime, which index refreshes already track.
+    """
+    index = index or SEARCH_INDEX
+    if LABEL_STORE is not None:
+        mtime = index.folder_mtimes.get(LABEL_STORE_PATH)
+    else:
+        signature = file_signature(os.path.join(BARCODE_ROOT, rel_image_path))
+        mtime = signature[0] if signature else None
+    return format(mtime, 'x') if mtime else None
+
+
+def label_image_url(sku, index=None):
+    """Return the URL of the label for sku: the pre-generated PNG if there is
+    one, otherwise the on-demand renderer. None if the SKU has no label."""
+    index = index or SEARCH_INDEX
+    rel_image_path = index.sku_to_image_path.get(sku)
+    if rel_image_path:
+        version = label_version(rel_image_path, index=index)
+        return '/barcode_image/' + rel_image_path + (f'?v={version}' if version else '')
+    if sku in index.sku_to_label:
+        return f'/label/{sku}.png'
+    return None
+
+
+def label_thumbnail_url(sku, index=None):
+    """Return the URL of the thumbnail for sku's label, or None if the SKU has no label."""
+    index = index or SEARCH_INDEX
+    rel_image_path = index.sku_to_image_path.get(sku)
+    if rel_image_path:
+        version = label_version(rel_image_path, index=index)
+        return '/thumbnail/' + rel_image_path + (f'?v={version}' if version else '')
+    if sku in index.sku_to_label:
+        return f'/label/{sku}/thumbnail'
+    return None
+
+
+def thumbnail_from_label(rel_image_path):
+    """Shrink a pre-generated label that has no thumbnail of its own.
+
+    Labels written before thumbnails existed are covered this way until
+    main.py is rerun; results are kept in the label cache.
+
+    Returns:
+        bytes: The thumbnail, or None if there is no such label PNG
+    """
+    if not rel_image_path.endswith('.png'):
+        return None
+    key = ('thumbnail', rel_image_path, label_version(rel_image_path))
+    thumbnail = LABEL_CACHE.get(key)
+    if thumbnail is not None:
+        return thumbnail
+    if LABEL_STORE is not None:
+        png = LABEL_STORE.get(rel_image_path)
+        source = io.BytesIO(png) if png is not None else None
+    else:
+        source = safe_join(BARCODE_ROOT, rel_image_path)
+        if source and not os.path.isfile(source):
+            source = None
+    if source is None:
+        return None
+    try:
+        with Image.open(source) as image:
+            thumbnail = encode_label_thumbnail(image)
+    except OSError:
+        # Not a readable image (UnidentifiedImageError is an OSError too)
+        return None
+    LABEL_CACHE.put(key, thumbnail)
+    return thumbnail
+
+
+app.jinja_env.globals['label_thumbnail_url'] = label_thumbnail_url
+
+
+def search_items(query, max_results=20, index=None):
+    """Look an item up by barcode number, SKU prefix and name, in that order.
+
+    Returns:
+        list: Up to max_results dicts with sku, name, image_url and thumbnail_url
+    """
+    index = index or SEARCH_INDEX
+    query = query.strip()
+    if not query:
+        return []
+
+    candidates = []
+    sku = find_sku_by_barcode(query, index=index)
+    if sku:
+        candidates.append({'sku': sku, 'name': index.sku_to_name.get(sku, '')})
+    if query.isalnum():
+        candidates.extend(find_sku_prefix_matches(query, max_results, index=index))
+    candidates.extend(find_name_matches(query, max_results, index=index))
+
+    results = []
     seen_skus = set()
-    for item in matched_items:
-        sku = item['sku']
-        if sku in seen_skus:
+    for item in candidates:
+        image_url = label_image_url(item['sku'], index=index)
+        if not image_url or item['sku'] in seen_skus:
             continue
-        seen_skus.add(sku)
-        unique_matches.append(item)
-        if len(unique_matches) >= max_results:
+        seen_skus.add(item['sku'])
+        results.append({
+            'sku': item['sku'],
+            'name': item['name'],
+            'image_url': image_url,
+            'thumbnail_url': label_thumbnail_url(item['sku'], index=index),
+        })
+        if len(results) >= max_results:
             break
-
-    unique_matches.sort(key=lambda item: item['name'])
-    return unique_matches
+    return results
 
 
 rebuild_indexes()
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.endpoint or 'not_found'
+        histogram = REQUEST_LATENCY.get(endpoint)
+        if histogram is None:
+            with _request_latency_lock:
+                histogram = REQUEST_LATENCY.setdefault(endpoint, LatencyHistogram())
+        histogram.observe((time.perf_counter() - started) * 1000)
+    return response
+
+@app.context_processor
+def inject_categories():
+    return {'categories': sorted(SEARCH_INDEX.category_items)}
+
 @app.route('/')
 def index():
     return render_template('index.html', mode='name')
@@ -128,6 +659,9 @@ def barcode_lookup():
     sku = request.args.get('sku', '').strip()
     name = request.args.get('name', '').strip()
     selected_sku = request.args.get('selected_sku', '').strip()
+    code = request.args.get('code', '').strip()
+    category = request.args.get('category', '').strip()
+    index = SEARCH_INDEX
 
     resolved_sku = sku
     matches = []
@@ -136,7 +670,7 @@ def barcode_lookup():
         if not name:
             return render_template('index.html', error='Please enter an item name.', mode='name', name=name, sku=sku)
 
-        matches = find_name_matches(name)
+        matches = find_name_matches(name, index=index)
         if not matches:
             return render_template('index.html', error=f'No item name match found for: {name}', mode='name', name=name, sku=sku)
 
@@ -158,47 +692,230 @@ def barcode_lookup():
             )
         else:
             resolved_sku = matches[0]['sku']
+    elif mode == 'scan':
+        if not code:
+            return render_template('index.html', error='Please scan or enter a barcode number.', mode='scan', code=code)
+
+        resolved_sku = find_sku_by_barcode(code, index=index)
+        if not resolved_sku:
+            return render_template('index.html', error=f'No item found for barcode: {code}', mode='scan', code=code)
+    elif mode == 'category':
+        matches = list_category_items(category, index=index)
+        if not matches:
+            return render_template('index.html', error=f'No items found in category: {category}', mode='category', category=category)
+
+        return render_template(
+            'index.html',
+            mode='category',
+            category=category,
+            matches=matches,
+            info=f'{len(matches)} items in {category}. Click an item to open barcode.'
+        )
     else:
         if not sku:
             return render_template('index.html', error='Please enter a SKU.', mode='sku', name=name, sku=sku)
 
-    rel_image_path = SKU_TO_IMAGE_PATH.get(resolved_sku)
-    if not rel_image_path:
+    rel_image_path = index.sku_to_image_path.get(resolved_sku)
+    image_url = label_image_url(resolved_sku, index=index)
+    if not image_url:
         return render_template('index.html', error=f'No barcode image found for SKU: {resolved_sku}', mode=mode, name=name, sku=sku)
 
     return render_template(
         'index.html',
         mode=mode,
         name=name,
+        code=code,
         sku=resolved_sku,
         matches=matches,
         info=info,
         modal_open=True,
         modal_sku=resolved_sku,
-        modal_image_path=rel_image_path
+        modal_image_path=rel_image_path,
+        modal_image_url=image_url
     )
 
+@app.route('/api/search')
+def api_search():
+    query = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        limit = 20
+
+    results = search_items(query, max_results=limit)
+    body = json.dumps({'q': query, 'results': results}, separators=(',', ':'), ensure_ascii=False)
+    response = app.response_class(body, mimetype='application/json')
+    response.add_etag()
+    response.cache_control.public = True
+    response.cache_control.max_age = 10
+    return response.make_conditional(request)
+
+@app.route('/metrics')
+def metrics():
+    index = SEARCH_INDEX
+    with _index_refresh_lock:
+        refresh_stats = dict(INDEX_REFRESH_STATS)
+    return jsonify({
+        'requests': {endpoint: histogram.snapshot() for endpoint, histogram in list(REQUEST_LATENCY.items())},
+        'indexes': {
+            'label_files': len(index.sku_to_image_path),
+            'catalog_items': len(index.searchable_items),
+            'renderable_skus': len(index.sku_to_label),
+            'barcode_numbers': len(index.barcode_to_sku),
+            'categories': len(index.category_items),
+            'name_grams': len(index.name_gram_index),
+            'label_folders': len(index.folder_skus),
+            'label_store': LABEL_STORE_PATH,
+        },
+        'index_refresh': refresh_stats,
+        'caches': {
+            'label_images': LABEL_CACHE.stats(),
+            'wildcard_patterns': compile_wildcard.cache_info()._asdict(),
+        },
+        'print_queue': PRINT_QUEUE.status(),
+    })
+
 @app.route('/barcode_image/<path:filename>')
 def barcode_image(filename):
     # filename includes category folder, e.g. Baking_Supplies/10000-527341680526.png
-    dir_name = os.path.dirname(filename)
-    file_name = os.path.basename(filename)
-    abs_dir = os.path.join(BARCODE_ROOT, dir_name)
-    if not os.path.exists(os.path.join(abs_dir, file_name)):
+    versioned = 'v' in request.args
+    max_age = VERSIONED_LABEL_MAX_AGE if versioned else 60
+    if LABEL_STORE is not None:
+        png = LABEL_STORE.get(filename)
+        if png is None:
+            abort(404)
+        response = app.response_class(png, mimetype='image/png')
+        response.add_etag()
+        response = response.make_conditional(request)
+    else:
+        # safe_join refuses paths that climb out of BARCODE_ROOT
+        abs_path = safe_join(BARCODE_ROOT, filename)
+        if not filename.endswith('.png') or abs_path is None or not os.path.isfile(abs_path):
+            abort(404)
+        # Streamed with the server's file wrapper, i.e. sendfile() under gunicorn
+        response = send_from_directory(BARCODE_ROOT, filename, max_age=max_age)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if versioned:
+        response.cache_control.immutable = True
+    return response
+
+@app.route('/label/<sku>.png')
+def label_image(sku):
+    # Rendered from the items.csv row, so labels exist before main.py is rerun
+    index = SEARCH_INDEX
+    label = index.sku_to_label.get(sku)
+    if not label:
+        abort(404)
+
+    etag = label_etag(sku, label)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        png = LABEL_CACHE.get(etag)
+        if png is None:
+            barcode_number, price, item_name = label
+            with _render_lock:
+                png = render_label_png(barcode_number, price, item_name)
+            LABEL_CACHE.put(etag, png)
+        response = app.response_class(png, mimetype='image/png')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response
+
+@app.route('/thumbnail/<path:filename>')
+def label_thumbnail(filename):
+    # filename is the label's path, e.g. Baking_Supplies/10000-527341680526.png
+    versioned = 'v' in request.args
+    max_age = VERSIONED_LABEL_MAX_AGE if versioned else THUMBNAIL_MAX_AGE
+    thumbnail_path = label_thumbnail_path(filename)
+    if LABEL_STORE is None and os.path.isfile(os.path.join(BARCODE_ROOT, thumbnail_path)):
+        response = send_from_directory(BARCODE_ROOT, thumbnail_path, mimetype=THUMBNAIL_MIMETYPE, max_age=max_age)
+    else:
+        thumbnail = LABEL_STORE.get_thumbnail(filename) if LABEL_STORE is not None else None
+        if thumbnail is None:
+            thumbnail = thumbnail_from_label(filename)
+        if thumbnail is None:
+            abort(404)
+        response = app.response_class(thumbnail, mimetype=THUMBNAIL_MIMETYPE)
+        response.add_etag()
+        response = response.make_conditional(request)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if versioned:
+        response.cache_control.immutable = True
+    return response
+
+@app.route('/label/<sku>/thumbnail')
+def label_thumbnail_on_demand(sku):
+    # Thumbnail of the on-demand label, for SKUs main.py has not rendered yet
+    index = SEARCH_INDEX
+    label = index.sku_to_label.get(sku)
+    if not label:
         abort(404)
-    return send_from_directory(abs_dir, file_name)
+
+    etag = 'thumbnail-' + label_etag(sku, label)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        thumbnail = LABEL_CACHE.get(etag)
+        if thumbnail is None:
+            with _render_lock:
+                thumbnail = encode_label_thumbnail(render_label_image(*label))
+            LABEL_CACHE.put(etag, thumbnail)
+        response = app.response_class(thumbnail, mimetype=THUMBNAIL_MIMETYPE)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = THUMBNAIL_MAX_AGE
+    return response
+
+@app.route('/print_queue', methods=['GET'])
+def print_queue_status():
+    return jsonify(PRINT_QUEUE.status())
+
+@app.route('/print_queue', methods=['POST'])
+def print_queue_add():
+    # Expects {"items": [{"sku": "10336", "quantity": 3}, ...]}
+    payload = request.get_json(silent=True)
+    entries = payload.get('items') if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'success': False, 'error': 'No items to print'}), 400
+
+    index = SEARCH_INDEX
+    queued = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            return jsonify({'success': False, 'error': 'Each item must be an object with a sku'}), 400
+        sku = str(entry.get('sku', '')).strip()
+        try:
+            quantity = int(entry.get('quantity', 1))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': f'Invalid quantity for SKU: {sku}'}), 400
+        if quantity < 1 or quantity > MAX_PRINT_QUANTITY:
+            return jsonify({'success': False, 'error': f'Quantity must be between 1 and {MAX_PRINT_QUANTITY}'}), 400
+        if not label_image_url(sku, index=index):
+            return jsonify({'success': False, 'error': f'No barcode found for SKU: {sku}'}), 404
+        queued.append((sku, quantity))
+
+    for sku, quantity in queued:
+        PRINT_QUEUE.add(sku, quantity)
+    total = sum(quantity for _, quantity in queued)
+    return jsonify({'success': True, 'message': f'Queued {total} label(s) for printing.'}), 202
 
 @app.route('/print_barcode/<path:filename>', methods=['POST'])
 def print_barcode(filename):
-    abs_path = os.path.join(BARCODE_ROOT, filename)
-    if not os.path.exists(abs_path):
+    # Kept for old clients: queues one label for the SKU in the file name
+    if LABEL_STORE is not None:
+        found = LABEL_STORE.contains(filename)
+    else:
+        found = os.path.exists(os.path.join(BARCODE_ROOT, filename))
+    if not found:
         return jsonify({'success': False, 'error': 'File not found'}), 404
-    try:
-        # Open the image in Preview for printing (macOS only)
-        subprocess.run(shlex.split(f'open -a Preview "{abs_path}"'), check=True)
-        return jsonify({'success': True, 'message': 'Image opened in Preview for printing!'}), 200
-    except (subprocess.CalledProcessError, OSError) as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    sku = label_filename_sku(os.path.basename(filename))
+    PRINT_QUEUE.add(sku, 1)
+    return jsonify({'success': True, 'message': 'Label queued for printing.'}), 202
 
 if __name__ == '__main__':
+    start_index_refresher()
     app.run(debug=True)
@@ -0,0 +1,63 @@
+"""Micro-benchmark for per-label render cost.
+
+Compares building fonts and metrics from scratch for every label (the way
+generate_barcode_image used to work) with one LabelRenderer shared across
+all labels.
+
+Usage:
+    python benchmarks/bench_label_renderer.py [--labels 200] [--font PATH]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import load_catalog  # noqa: E402
+from main import LabelRenderer  # noqa: E402
+
+ITEMS_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'items.csv')
+
+
+def load_sample_rows(limit):
+    """Return up to limit (barcode, price, name) tuples from items.csv."""
+    rows = [(item.barcode, item.price, item.name) for item in load_catalog(ITEMS_CSV) if item.barcode]
+    return rows[:limit]
+
+
+def time_per_label(render, rows):
+    """Return the mean milliseconds render() takes per row."""
+    start = time.perf_counter()
+    for barcode_number, price, item_name in rows:
+        render(barcode_number, price, item_name)
+    return (time.perf_counter() - start) * 1000 / len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-label render cost.")
+    parser.add_argument('--labels', type=int, default=200, help="Number of labels to render per run")
+    parser.add_argument('--font', help="TrueType font to render with")
+    args = parser.parse_args()
+
+    rows = load_sample_rows(args.labels)
+    if not rows:
+        print("No rows with barcodes found in items.csv")
+        return
+
+    shared = LabelRenderer(font_path=args.font)
+    # Warm up imports and caches so both runs start from the same state
+    shared.render(*rows[0])
+
+    uncached_ms = time_per_label(lambda *row: LabelRenderer(font_path=args.font).render(*row), rows)
+    shared_ms = time_per_label(shared.render, rows)
+
+    print(f"Font: {shared.font_path or 'Pillow default'}")
+    print(f"Labels: {len(rows)}")
+    print(f"Fresh resources per label: {uncached_ms:.2f} ms/label")
+    print(f"Shared LabelRenderer:      {shared_ms:.2f} ms/label")
+    print(f"Speedup: {uncached_ms / shared_ms:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
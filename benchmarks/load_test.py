@@ -0,0 +1,178 @@
+"""Load test for a running barcode finder.
+
+Hammers the search API and the label image routes from several client
+threads over keep-alive connections and reports requests per second and
+latency percentiles for each route. Start the server first, e.g. with
+./run_production.sh or `python app.py`.
+
+Usage:
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --concurrency 16 --duration 20
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+ITEMS_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'items.csv')
+
+
+def summarize(samples_ms, seconds, errors):
+    """Throughput and latency percentiles of one route."""
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {'requests': 0, 'errors': errors}
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'requests_per_second': round(len(ordered) / seconds, 1),
+        'p50_ms': pick(0.50),
+        'p90_ms': pick(0.90),
+        'p99_ms': pick(0.99),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def search_queries(csv_file, count, seed):
+    """Pick realistic queries (words, name prefixes and barcodes) from items.csv."""
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    rng = random.Random(seed)
+    words = [word for row in rows for word in (row.get('Name') or '').split() if len(word) > 2]
+    barcodes = [row['Barcode'] for row in rows if row.get('Barcode')]
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            queries.append(rng.choice(words))
+        elif kind < 0.8:
+            queries.append(rng.choice(words)[:3] + '*')
+        else:
+            queries.append(rng.choice(barcodes))
+    return queries
+
+
+class Client:
+    """One keep-alive HTTP connection, reopened after errors."""
+
+    def __init__(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.connection = None
+
+    def get(self, path):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            self.connection.request('GET', path)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+
+
+def collect_image_paths(url, queries, limit, field='image_url'):
+    """Resolve label image (or thumbnail) URLs through the search API, for the image route tests."""
+    client = Client(url)
+    paths = []
+    for query in queries:
+        status, body = client.get('/api/search?' + urllib.parse.urlencode({'q': query}))
+        if status == 200:
+            paths.extend(result[field] for result in json.loads(body)['results'])
+        if len(paths) >= limit:
+            break
+    return sorted(set(paths))[:limit]
+
+
+def run_route(url, paths, concurrency, duration):
+    """GET random paths from concurrency threads for duration seconds."""
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = Client(url)
+        local_samples = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            path = rng.choice(paths)
+            start = time.perf_counter()
+            try:
+                status, _ = client.get(path)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                continue
+            local_samples.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                local_errors += 1
+        with lock:
+            samples.extend(local_samples)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, time.perf_counter() - started, errors[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the barcode finder's search and image routes.")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="Base URL of the running server")
+    parser.add_argument('--concurrency', type=int, default=8, help="Client threads per route")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds spent on each route")
+    parser.add_argument('--queries', type=int, default=500, help="Distinct search queries")
+    parser.add_argument('--images', type=int, default=200, help="Distinct label images requested")
+    parser.add_argument('--items-csv', default=ITEMS_CSV, help="Catalog to draw queries from")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--output', help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    queries = search_queries(args.items_csv, args.queries, args.seed)
+    search_paths = ['/api/search?' + urllib.parse.urlencode({'q': query}) for query in queries]
+    image_paths = collect_image_paths(args.url, queries, args.images)
+    static_paths = [path for path in image_paths if path.startswith('/barcode_image/')]
+    rendered_paths = [path for path in image_paths if path.startswith('/label/')]
+    thumbnail_paths = [path for path in collect_image_paths(args.url, queries, args.images, field='thumbnail_url')
+                       if path.startswith('/thumbnail/')]
+
+    report = {
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'duration_seconds': args.duration,
+        'routes': {},
+    }
+    routes = [('search', search_paths), ('barcode_image', static_paths), ('label', rendered_paths),
+              ('thumbnail', thumbnail_paths)]
+    for name, paths in routes:
+        if not paths:
+            continue
+        print(f"Loading {name} ({len(paths)} distinct URLs)...", flush=True)
+        report['routes'][name] = run_route(args.url, paths, args.concurrency, args.duration)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Wrote {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
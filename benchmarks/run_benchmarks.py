@@ -0,0 +1,270 @@
+"""Benchmark suite for the render, sheet build and search hot paths.
+
+Builds synthetic catalogs of each requested size and times:
+
+- generate_barcode_image per label
+- a full main() run (and an unchanged re-run) on up to --main-rows rows
+- create_barcode_sheets per page on the labels main() produced
+- build_barcode_index / build_name_index startup at every catalog size
+- find_name_matches query latency percentiles at every catalog size
+
+Results are written as JSON so runs can be compared between releases.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000 --output bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The web app polls for index changes by default; benchmarks rebuild explicitly
+os.environ.setdefault('BARCODE_INDEX_REFRESH_SECONDS', '0')
+
+import app  # noqa: E402
+import catalog  # noqa: E402
+import create_print_sheets  # noqa: E402
+import main as label_main  # noqa: E402
+from synthetic_catalog import generate_catalog  # noqa: E402
+
+
+def percentiles(samples_ms):
+    """Summarize a list of millisecond timings."""
+    ordered = sorted(samples_ms)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 4)
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered), 4),
+        'p50_ms': pick(0.50),
+        'p90_ms': pick(0.90),
+        'p99_ms': pick(0.99),
+        'max_ms': round(ordered[-1], 4),
+    }
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def quiet():
+    """Swallow the progress output of the scripts being measured."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def bench_render(workdir, samples):
+    """Time generate_barcode_image for individual labels."""
+    items = [item for item in catalog.load_catalog(os.path.join(workdir, 'items.csv')) if item.barcode][:samples]
+    output = os.path.join(workdir, 'render_samples')
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        label_main.generate_barcode_image(output, item.barcode, item.price, item.sku, item.name)
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentiles(timings)
+
+
+def bench_main(workdir, workers):
+    """Time a full main() run and an unchanged re-run in workdir."""
+    with working_directory(workdir), quiet():
+        start = time.perf_counter()
+        label_main.main(workers=workers, force=True)
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        label_main.main(workers=workers)
+        rerun_seconds = time.perf_counter() - start
+
+    labels = len(label_main.load_manifest(os.path.join(workdir, label_main.MANIFEST_FILE)))
+    return {
+        'labels': labels,
+        'workers': workers,
+        'full_run_seconds': round(full_seconds, 3),
+        'labels_per_second': round(labels / full_seconds, 1) if full_seconds else None,
+        'unchanged_rerun_seconds': round(rerun_seconds, 3),
+    }
+
+
+def bench_sheets(workdir):
+    """Time create_barcode_sheets over the labels in workdir."""
+    output = os.path.join(workdir, 'bench_sheets.pdf')
+    with working_directory(workdir), quiet():
+        start = time.perf_counter()
+        create_print_sheets.create_barcode_sheets(output)
+        seconds = time.perf_counter() - start
+    labels = sum(1 for _ in create_print_sheets.iter_label_files(workdir))
+    pages = -(-labels // 20)
+    return {
+        'labels': labels,
+        'pages': pages,
+        'seconds': round(seconds, 3),
+        'ms_per_page': round(seconds * 1000 / pages, 3) if pages else None,
+        'pdf_bytes': os.path.getsize(output) if os.path.exists(output) else 0,
+    }
+
+
+def make_placeholder_labels(workdir, items, limit):
+    """Create empty label files so the folder scan sees a realistic tree."""
+    for item in items[:limit]:
+        folder = os.path.join(workdir, label_main.clean_filename(item.category) or 'Uncategorized')
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, label_main.clean_filename(f"{item.sku}-{item.barcode}") + '.png')
+        open(path, 'wb').close()
+
+
+def bench_indexes(workdir, max_label_files):
+    """Time the web app's index builds against the catalog in workdir."""
+    items_csv = os.path.join(workdir, 'items.csv')
+    items = catalog.load_catalog(items_csv, use_snapshot=False)
+    make_placeholder_labels(workdir, items, max_label_files)
+
+    app.BARCODE_ROOT = workdir
+    app.ITEMS_CSV = items_csv
+
+    start = time.perf_counter()
+    sku_index = app.build_barcode_index()
+    barcode_seconds = time.perf_counter() - start
+
+    # Cold: no snapshot on disk and nothing memoized in this process
+    catalog._loaded.clear()
+    snapshot = catalog.snapshot_path(items_csv)
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+    start = time.perf_counter()
+    app.build_name_index()
+    name_cold_seconds = time.perf_counter() - start
+
+    # Warm: the snapshot written by the cold run is loaded instead of the CSV
+    catalog._loaded.clear()
+    start = time.perf_counter()
+    app.build_name_index()
+    name_warm_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app.refresh_indexes(force=True)
+    refresh_seconds = time.perf_counter() - start
+
+    return {
+        'label_files': len(sku_index),
+        'build_barcode_index_seconds': round(barcode_seconds, 3),
+        'build_name_index_cold_seconds': round(name_cold_seconds, 3),
+        'build_name_index_snapshot_seconds': round(name_warm_seconds, 3),
+        'refresh_indexes_full_seconds': round(refresh_seconds, 3),
+    }
+
+
+def bench_search(queries_per_kind, seed=0):
+    """Time find_name_matches against the index built by bench_indexes."""
+    rng = random.Random(seed)
+    names = [normalized for normalized, _, _ in app.SEARCH_INDEX.searchable_items]
+    words = [word for name in rng.sample(names, min(len(names), 2000)) for word in name.split() if len(word) > 2]
+
+    queries = {
+        'word': [rng.choice(words) for _ in range(queries_per_kind)],
+        'two_words': [f"{rng.choice(words)} {rng.choice(words)}" for _ in range(queries_per_kind)],
+        'prefix_wildcard': [rng.choice(words)[:3] + '*' for _ in range(queries_per_kind)],
+        'infix_wildcard': [f"*{rng.choice(words)}*{rng.choice(words)[:2]}*" for _ in range(queries_per_kind)],
+        'miss': [f"zzq{number}" for number in range(queries_per_kind)],
+    }
+
+    results = {}
+    for kind, kind_queries in queries.items():
+        timings = []
+        for query in kind_queries:
+            start = time.perf_counter()
+            app.find_name_matches(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[kind] = percentiles(timings)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark render, sheet build and search hot paths.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help="Synthetic catalog sizes to benchmark startup and search at")
+    parser.add_argument('--render-samples', type=int, default=200, help="Labels timed individually")
+    parser.add_argument('--main-rows', type=int, default=2000,
+                        help="Catalog size for the full main() and sheet benchmarks")
+    parser.add_argument('--workers', type=int, default=1, help="Workers for the main() benchmark")
+    parser.add_argument('--max-label-files', type=int, default=100000,
+                        help="Most placeholder label files created for the folder scan")
+    parser.add_argument('--queries', type=int, default=500, help="Queries per search kind")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for catalogs and queries")
+    parser.add_argument('--output', help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': vars(args),
+        },
+        'render': None,
+        'main': None,
+        'sheets': None,
+        'catalogs': [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix='barcode-bench-')
+    try:
+        print(f"Rendering with a {args.main_rows}-row catalog", file=sys.stderr)
+        generate_catalog(os.path.join(workdir, 'items.csv'), args.main_rows, seed=args.seed)
+        report['render'] = bench_render(workdir, args.render_samples)
+        shutil.rmtree(os.path.join(workdir, 'render_samples'), ignore_errors=True)
+        report['main'] = bench_main(workdir, args.workers)
+        report['sheets'] = bench_sheets(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for size in args.sizes:
+        print(f"Indexing and searching a {size}-row catalog", file=sys.stderr)
+        workdir = tempfile.mkdtemp(prefix='barcode-bench-')
+        try:
+            generate_catalog(os.path.join(workdir, 'items.csv'), size, seed=args.seed)
+            entry = {'rows': size}
+            entry['indexes'] = bench_indexes(workdir, args.max_label_files)
+            entry['search'] = bench_search(args.queries, seed=args.seed)
+            report['catalogs'].append(entry)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Generate synthetic items.csv catalogs of any size for benchmarking.
+
+Rows are cloned from the real items.csv with unique SKUs, barcodes and
+name suffixes, so names, categories and prices keep a realistic shape.
+
+Usage:
+    python benchmarks/synthetic_catalog.py --rows 100000 --output /tmp/items.csv
+"""
+import argparse
+import csv
+import os
+import random
+
+ITEMS_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'items.csv')
+
+NAME_SUFFIXES = ['', ' 250G', ' 500G', ' 1KG', ' 6S', ' 12S', ' BIG', ' MINI', ' (REPACKED)', ' VANILLA', ' UBE', ' MOCHA']
+
+
+def generate_catalog(output_path, rows, seed=0, template_csv=ITEMS_CSV):
+    """Write a catalog of rows items shaped like template_csv.
+
+    Args:
+        output_path (str): Where to write the CSV
+        rows (int): Number of item rows to write
+        seed (int): Random seed, so the same arguments give the same file
+        template_csv (str): Catalog to clone rows from
+
+    Returns:
+        str: output_path
+    """
+    with open(template_csv, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        templates = [row for row in reader if row]
+
+    positions = {title: index for index, title in enumerate(header)}
+    sku_index = positions['SKU']
+    name_index = positions['Name']
+    barcode_index = positions['Barcode']
+    handle_index = positions.get('Handle')
+
+    rng = random.Random(seed)
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for number in range(rows):
+            row = list(rng.choice(templates))
+            row += [''] * (len(header) - len(row))
+            sku = str(100000 + number)
+            row[sku_index] = sku
+            row[name_index] = f"{row[name_index]}{rng.choice(NAME_SUFFIXES)} #{number}"
+            row[barcode_index] = f"9{number:011d}"
+            if handle_index is not None:
+                row[handle_index] = f"item-{sku}"
+            writer.writerow(row)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic items.csv for benchmarking.")
+    parser.add_argument('--rows', type=int, default=10000, help="Number of item rows")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--output', default='items_synthetic.csv', help="Output CSV path")
+    args = parser.parse_args()
+    generate_catalog(args.output, args.rows, seed=args.seed)
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Shared loader for the items.csv catalog.
+
+Columns are resolved from the header row instead of fixed positions, and the
+parsed items are cached in a pickled snapshot next to the CSV so the web app
+and the batch tools don't re-parse the CSV on every start.
+"""
+import csv
+import hashlib
+import os
+import pickle
+
+
+# Item attribute -> items.csv header
+COLUMNS = {
+    'sku': 'SKU',
+    'name': 'Name',
+    'category': 'Category',
+    'barcode': 'Barcode',
+    'price': "Price [Ant's Corner]",
+    'in_stock': "In stock [Ant's Corner]",
+    'low_stock': "Low stock [Ant's Corner]",
+}
+REQUIRED_COLUMNS = ('sku', 'name', 'barcode')
+
+# Bump when Item or the parsing rules change so old snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+# Catalogs already loaded in this process, keyed by CSV path
+_loaded = {}
+
+
+class Item:
+    """One row of items.csv."""
+
+    __slots__ = ('row_num', 'sku', 'name', 'category', 'barcode', 'price', 'in_stock', 'low_stock')
+
+    def __init__(self, row_num, sku, name, category, barcode, price, in_stock=None, low_stock=None):
+        self.row_num = row_num
+        self.sku = sku
+        self.name = name
+        self.category = category
+        self.barcode = barcode
+        self.price = price
+        self.in_stock = in_stock
+        self.low_stock = low_stock
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self):
+        return f"Item(sku={self.sku!r}, name={self.name!r}, barcode={self.barcode!r})"
+
+
+def parse_count(value):
+    """Parse a stock count, returning an int, a float for fractional stock, or None."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def resolve_columns(header):
+    """Map Item attributes to column positions by header name.
+
+    Header matching ignores case and surrounding whitespace.
+
+    Raises:
+        ValueError: If a required column is missing
+    """
+    positions = {title.strip().lower(): index for index, title in enumerate(header)}
+    columns = {}
+    for attribute, title in COLUMNS.items():
+        index = positions.get(title.lower())
+        if index is None and attribute in REQUIRED_COLUMNS:
+            raise ValueError(f"items.csv is missing the '{title}' column")
+        columns[attribute] = index
+    return columns
+
+
+def parse_catalog(csv_path):
+    """Parse items.csv into a list of Items, in file order."""
+    items = []
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return items
+        columns = resolve_columns(header)
+
+        def cell(row, attribute):
+            index = columns[attribute]
+            if index is None or index >= len(row):
+                return ''
+            return row[index].strip()
+
+        for row_num, row in enumerate(reader, start=2):
+            if not any(row):
+                continue
+            items.append(Item(
+                row_num=row_num,
+                sku=cell(row, 'sku'),
+                name=cell(row, 'name'),
+                category=cell(row, 'category'),
+                barcode=cell(row, 'barcode'),
+                price=cell(row, 'price'),
+                in_stock=parse_count(cell(row, 'in_stock')),
+                low_stock=parse_count(cell(row, 'low_stock')),
+            ))
+    return items
+
+
+def snapshot_path(csv_path):
+    """Return where the parsed snapshot of csv_path is stored."""
+    directory, file_name = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(directory, f".{file_name}.cache.pickle")
+
+
+def file_digest(path):
+    """Return the SHA-1 hex digest of a file's contents."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def _write_snapshot(path, snapshot):
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        # A read-only checkout still works, it just re-parses every time
+        pass
+
+
+def load_catalog(csv_path='items.csv', use_snapshot=True):
+    """Load the catalog, reusing the parsed snapshot when the CSV is unchanged.
+
+    The snapshot is trusted as-is when the CSV's mtime and size match. If only
+    the mtime changed (e.g. the file was copied or touched) the contents hash
+    decides, so an identical CSV is still not re-parsed.
+
+    Args:
+        csv_path (str): Path of items.csv
+        use_snapshot (bool): Read and write the on-disk snapshot
+
+    Returns:
+        list: Items in file order; treat it as read-only, it is shared
+        between callers in the same process
+
+    Raises:
+        FileNotFoundError: If csv_path does not exist
+        ValueError: If a required column is missing
+    """
+    stat = os.stat(csv_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = os.path.abspath(csv_path)
+
+    loaded = _loaded.get(key)
+    if loaded and loaded[0] == signature:
+        return loaded[1]
+
+    if not use_snapshot:
+        items = parse_catalog(csv_path)
+        _loaded[key] = (signature, items)
+        return items
+
+    cache_path = snapshot_path(csv_path)
+    snapshot = _read_snapshot(cache_path)
+    if snapshot and (snapshot['mtime_ns'], snapshot['size']) == signature:
+        items = snapshot['items']
+    else:
+        digest = file_digest(csv_path)
+        if snapshot and snapshot['size'] == stat.st_size and snapshot['sha1'] == digest:
+            items = snapshot['items']
+        else:
+            items = parse_catalog(csv_path)
+        _write_snapshot(cache_path, {
+            'version': SNAPSHOT_VERSION,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha1': digest,
+            'items': items,
+        })
+
+    _loaded[key] = (signature, items)
+    return items
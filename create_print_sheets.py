@@ -1,23 +1,154 @@
 import os
 import glob
+import barcode
 from PIL import Image, ImageDraw
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4, letter
 from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+import argparse
+import io
+import itertools
+import json
 import math
+import time
 
-def create_barcode_sheets(output_filename="barcode_sheets.pdf", barcodes_per_row=4, barcodes_per_col=5):
+from catalog import load_catalog
+from label_store import LabelStore
+from label_templates import (DEFAULT_SHEETS, LABEL_TEMPLATES, SHEET_TEMPLATES, get_label_template,
+                             get_sheet_template)
+
+# Page sizes sheet templates may name
+PAGE_SIZES = {'A4': A4, 'letter': letter}
+
+# Stock levels seen by the last restock run, for --quantity-from delta
+RESTOCK_STATE_FILE = '.restock_state.json'
+
+# Vector label text sizes in points, matching the raster labels once scaled to 50 x 30 mm
+VECTOR_NAME_FONT_SIZE = 8
+VECTOR_DIGITS_FONT_SIZE = 6
+VECTOR_PRICE_FONT_SIZE = 9
+
+def sheet_slots(page_size, barcodes_per_row, barcodes_per_col, barcode_width=50 * mm, barcode_height=30 * mm,
+                top_margin=0, bottom_margin=0):
+    """Return the (x, y) bottom-left corner of every label slot on a page, in reading order.
+
+    Labels are spread evenly over the page minus top_margin and
+    bottom_margin, which keep the page header and footer clear of them.
+    """
+    page_width, page_height = page_size
+    usable_height = page_height - top_margin - bottom_margin
+    margin_x = (page_width - barcodes_per_row * barcode_width) / (barcodes_per_row + 1)
+    margin_y = (usable_height - barcodes_per_col * barcode_height) / (barcodes_per_col + 1)
+    if margin_x < 0 or margin_y < 0:
+        raise ValueError(f"{barcodes_per_row} x {barcodes_per_col} labels of "
+                         f"{barcode_width / mm:.0f} x {barcode_height / mm:.0f} mm do not fit on the page")
+
+    slots = []
+    for row in range(barcodes_per_col):
+        for col in range(barcodes_per_row):
+            x = margin_x + col * (barcode_width + margin_x)
+            y = page_height - top_margin - (row + 1) * (barcode_height + margin_y)
+            slots.append((x, y))
+    return slots
+
+
+def sheet_layout(barcodes_per_row, barcodes_per_col, page_size=A4, barcode_width=50 * mm, barcode_height=30 * mm,
+                 top_margin=0, bottom_margin=0):
+    """Compute the label slots of a sheet once so every page can reuse them.
+
+    Returns:
+        dict: page_size, barcode_width, barcode_height and slots, the (x, y)
+        bottom-left corner of every label slot in reading order
+    """
+    return {
+        'page_size': page_size,
+        'barcode_width': barcode_width,
+        'barcode_height': barcode_height,
+        'barcodes_per_row': barcodes_per_row,
+        'barcodes_per_col': barcodes_per_col,
+        'slots': sheet_slots(page_size, barcodes_per_row, barcodes_per_col, barcode_width, barcode_height,
+                             top_margin, bottom_margin),
+    }
+
+
+@lru_cache(maxsize=None)
+def sheet_template_layout(name):
+    """Return the sheet_layout() of a sheet template, computed once per process.
+
+    The slot size is the physical size of the template's labels.
+    """
+    sheet = get_sheet_template(name)
+    width_mm, height_mm = get_label_template(sheet['label_template'])['size_mm']
+    return sheet_layout(sheet['columns'], sheet['rows'], page_size=PAGE_SIZES[sheet['page_size']],
+                        barcode_width=width_mm * mm, barcode_height=height_mm * mm,
+                        top_margin=sheet['top_margin_mm'] * mm, bottom_margin=sheet['bottom_margin_mm'] * mm)
+
+
+def draw_sheet_pages(c, barcode_files, layout, page_footer, page_header=None, show_progress=False):
+    """Place barcode images onto consecutive pages of a canvas.
+
+    Args:
+        c (Canvas): The ReportLab canvas to draw on
+        barcode_files (list): Image paths to place, in order
+        layout (dict): Sheet layout from sheet_layout()
+        page_footer (callable): Called with (page_num, total_pages), returns the footer text
+        page_header (str): Optional bold header drawn at the top of every page
+        show_progress (bool): Print a line per page
+
+    Returns:
+        int: Number of pages drawn
+    """
+    slots = layout['slots']
+    page_height = layout['page_size'][1]
+    barcodes_per_page = len(slots)
+    total_pages = math.ceil(len(barcode_files) / barcodes_per_page)
+
+    for page_num in range(total_pages):
+        if show_progress:
+            print(f"Processing page {page_num + 1}/{total_pages}")
+
+        start_idx = page_num * barcodes_per_page
+        page_barcodes = barcode_files[start_idx:start_idx + barcodes_per_page]
+
+        # Place barcodes on page
+        for (x, y), barcode_file in zip(slots, page_barcodes):
+            try:
+                c.drawImage(barcode_file, x, y, width=layout['barcode_width'], height=layout['barcode_height'])
+            except Exception as e:
+                print(f"Error adding {barcode_file}: {e}")
+
+        if page_header:
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(50, page_height - 20, page_header)
+
+        # Add page info
+        c.setFont("Helvetica", 8)
+        c.drawString(10, 10, page_footer(page_num + 1, total_pages))
+
+        # Start new page if not last page
+        if page_num < total_pages - 1:
+            c.showPage()
+
+    return total_pages
+
+
+def create_barcode_sheets(output_filename="barcode_sheets.pdf", sheet="a4_4x5", root="."):
     """Create PDF sheets with multiple barcodes for easy printing.
     
     Args:
         output_filename (str): Name of the output PDF file
-        barcodes_per_row (int): Number of barcodes per row
-        barcodes_per_col (int): Number of barcodes per column
+        sheet (str): Name of the sheet template in SHEET_TEMPLATES
+        root (str): Folder holding the category folders of label PNGs
     """
     
     # Get all barcode images
     barcode_files = []
-    for folder in glob.glob("*/"):
+    for folder in glob.glob(os.path.join(root, "*/") if root != "." else "*/"):
         if os.path.isdir(folder):
             folder_barcodes = glob.glob(os.path.join(folder, "*.png"))
             barcode_files.extend(folder_barcodes)
@@ -28,162 +159,530 @@ def create_barcode_sheets(output_filename="barcode_sheets.pdf", barcodes_per_row
     
     print(f"Found {len(barcode_files)} barcode files")
     
-    # PDF setup
-    page_width, page_height = A4
-    c = canvas.Canvas(output_filename, pagesize=A4)
-    
-    # Calculate barcode dimensions and spacing
-    barcode_width = 50 * mm   # 50mm width
-    barcode_height = 30 * mm  # 30mm height
-    
-    # Calculate margins and spacing
-    total_barcodes_width = barcodes_per_row * barcode_width
-    total_barcodes_height = barcodes_per_col * barcode_height
-    
-    margin_x = (page_width - total_barcodes_width) / (barcodes_per_row + 1)
-    margin_y = (page_height - total_barcodes_height) / (barcodes_per_col + 1)
+    layout = sheet_template_layout(sheet)
+    barcodes_per_page = len(layout['slots'])
+    print(f"Creating {math.ceil(len(barcode_files) / barcodes_per_page)} pages with {barcodes_per_page} barcodes per page")
     
-    barcodes_per_page = barcodes_per_row * barcodes_per_col
-    total_pages = math.ceil(len(barcode_files) / barcodes_per_page)
-    
-    print(f"Creating {total_pages} pages with {barcodes_per_page} barcodes per page")
-    
-    # Process barcodes
-    for page_num in range(total_pages):
-        print(f"Processing page {page_num + 1}/{total_pages}")
-        
-        start_idx = page_num * barcodes_per_page
-        end_idx = min(start_idx + barcodes_per_page, len(barcode_files))
-        page_barcodes = barcode_files[start_idx:end_idx]
-        
-        # Place barcodes on page
-        for i, barcode_file in enumerate(page_barcodes):
-            row = i // barcodes_per_row
-            col = i % barcodes_per_row
-            
-            # Calculate position (from bottom-left)
-            x = margin_x + col * (barcode_width + margin_x)
-            y = page_height - margin_y - (row + 1) * (barcode_height + margin_y)
-            
-            # Add barcode to PDF
-            try:
-                c.drawImage(barcode_file, x, y, width=barcode_width, height=barcode_height)
-            except Exception as e:
-                print(f"Error adding {barcode_file}: {e}")
-        
-        # Add page info
-        c.setFont("Helvetica", 8)
-        c.drawString(10, 10, f"Page {page_num + 1} of {total_pages} | Generated from Ant's Corner inventory")
-        
-        # Start new page if not last page
-        if page_num < total_pages - 1:
-            c.showPage()
+    c = canvas.Canvas(output_filename, pagesize=layout['page_size'])
+    total_pages = draw_sheet_pages(
+        c, barcode_files, layout,
+        page_footer=lambda page, total: f"Page {page} of {total} | Generated from Ant's Corner inventory",
+        show_progress=True,
+    )
     
     # Save PDF
     c.save()
     print(f"\nPDF created successfully: {output_filename}")
     print(f"Total barcodes: {len(barcode_files)}")
     print(f"Pages: {total_pages}")
-    print(f"Layout: {barcodes_per_row} x {barcodes_per_col} barcodes per page")
+    print(f"Layout: {layout['barcodes_per_row']} x {layout['barcodes_per_col']} barcodes per page")
+
+
+def create_category_pdf(folder, sheets=("a4_4x5", "a4_4x9")):
+    """Create the PDF for a single category folder.
+
+    Runs in a worker process when category PDFs are built concurrently, so
+    it only takes and returns picklable values.
 
-def create_category_sheets():
-    """Create separate PDF sheets for each category."""
-    folders = [f for f in glob.glob("*/") if os.path.isdir(f) and glob.glob(os.path.join(f, "*.png"))]
+    Args:
+        folder (str): Category folder containing barcode PNGs
+        sheets (tuple): Sheet template for categories that fit on one page,
+            and the denser one used for larger categories
+
+    Returns:
+        tuple: (output_filename, barcode_count, seconds), output_filename is
+        None when the folder has no barcodes
+    """
+    start = time.perf_counter()
+    folder_name = folder.rstrip('/')
+    category = os.path.basename(folder_name)
+    barcode_files = glob.glob(os.path.join(folder, "*.png"))
+    if not barcode_files:
+        return None, 0, 0.0
+    
+    output_filename = f"{folder_name}_barcodes.pdf"
+    
+    # Calculate optimal layout based on number of barcodes
+    small_layout = sheet_template_layout(sheets[0])
+    if len(barcode_files) <= len(small_layout['slots']):
+        layout = small_layout
+    else:
+        layout = sheet_template_layout(sheets[1])
+    
+    c = canvas.Canvas(output_filename, pagesize=layout['page_size'])
+    draw_sheet_pages(
+        c, barcode_files, layout,
+        page_footer=lambda page, total: f"Page {page} of {total} | {category} | {len(barcode_files)} total barcodes",
+        page_header=f"{category.replace('_', ' ').title()} - Barcodes",
+    )
+    c.save()
+    return output_filename, len(barcode_files), time.perf_counter() - start
+
+
+def create_category_sheets(workers=1, root=".", sheets=("a4_4x5", "a4_4x9")):
+    """Create separate PDF sheets for each category.
+
+    Args:
+        workers (int): Number of worker processes building PDFs concurrently
+            (0 = one per CPU core)
+        root (str): Folder holding the category folders of label PNGs
+        sheets (tuple): Sheet templates, see create_category_pdf
+    """
+    pattern = os.path.join(root, "*/") if root != "." else "*/"
+    folders = [f for f in glob.glob(pattern) if os.path.isdir(f) and glob.glob(os.path.join(f, "*.png"))]
     
     if not folders:
         print("No folders with barcodes found.")
         return
     
-    for folder in folders:
-        folder_name = folder.rstrip('/')
-        barcode_files = glob.glob(os.path.join(folder, "*.png"))
-        
-        if not barcode_files:
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    
+    start = time.perf_counter()
+    if workers > 1 and len(folders) > 1:
+        print(f"Building {len(folders)} category PDFs with {workers} workers")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(partial(create_category_pdf, sheets=sheets), folders))
+    else:
+        results = [create_category_pdf(folder, sheets) for folder in folders]
+    
+    for output_filename, barcode_count, seconds in results:
+        if output_filename:
+            print(f"Created: {output_filename} ({barcode_count} barcodes, {seconds:.2f}s)")
+    print(f"Category PDFs finished in {time.perf_counter() - start:.2f}s")
+
+
+def iter_label_files(root="."):
+    """Yield (key, path) for every generated barcode PNG, one folder at a time.
+
+    The key is the file name (SKU-barcode), so the same label found twice is
+    embedded once.
+    """
+    for folder in sorted(entry.path for entry in os.scandir(root) if entry.is_dir()):
+        with os.scandir(folder) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_file() and entry.name.endswith('.png'):
+                    yield entry.name[:-4], entry.path
+
+
+def iter_store_labels(store_path):
+    """Yield (category, key, file object) for every label in a label store.
+
+    Labels come out grouped by category folder, in the order
+    iter_label_files would find them on disk.
+    """
+    for path, png in LabelStore(store_path, readonly=True).iter_labels():
+        category, _, file_name = path.rpartition('/')
+        yield category, file_name[:-4], io.BytesIO(png)
+
+
+def create_store_category_sheets(store_path):
+    """Create one PDF per category straight from a label store."""
+    for category, labels in itertools.groupby(iter_store_labels(store_path), key=lambda label: label[0]):
+        start = time.perf_counter()
+        output_filename = f"{category or 'Uncategorized'}_barcodes.pdf"
+        count = create_barcode_sheets_streaming(((key, source) for _, key, source in labels), output_filename)
+        print(f"  {output_filename}: {count} barcodes in {time.perf_counter() - start:.2f}s")
+
+
+def iter_catalog_labels(csv_file="items.csv", template="standard"):
+    """Yield (key, image) for every item in items.csv, rendered in memory.
+
+    Labels are rendered lazily as the PDF consumes them, so no PNGs are
+    needed on disk and only one rendered label is held at a time.
+    """
+    from main import render_label_image
+
+    for item in load_catalog(csv_file):
+        if not item.barcode:
             continue
-            
-        print(f"\nCreating PDF for {folder_name} ({len(barcode_files)} barcodes)")
-        
-        # Create PDF for this category
-        output_filename = f"{folder_name}_barcodes.pdf"
-        
-        # Calculate optimal layout based on number of barcodes
-        if len(barcode_files) <= 20:
-            barcodes_per_row = 4
-            barcodes_per_col = 5
-        else:
-            barcodes_per_row = 5
-            barcodes_per_col = 6
-        
-        # PDF setup
-        page_width, page_height = A4
-        c = canvas.Canvas(output_filename, pagesize=A4)
-        
-        # Calculate dimensions
-        barcode_width = 50 * mm
-        barcode_height = 30 * mm
-        
-        total_barcodes_width = barcodes_per_row * barcode_width
-        total_barcodes_height = barcodes_per_col * barcode_height
-        
-        margin_x = (page_width - total_barcodes_width) / (barcodes_per_row + 1)
-        margin_y = (page_height - total_barcodes_height) / (barcodes_per_col + 1)
-        
-        barcodes_per_page = barcodes_per_row * barcodes_per_col
-        total_pages = math.ceil(len(barcode_files) / barcodes_per_page)
-        
-        # Process pages
-        for page_num in range(total_pages):
-            start_idx = page_num * barcodes_per_page
-            end_idx = min(start_idx + barcodes_per_page, len(barcode_files))
-            page_barcodes = barcode_files[start_idx:end_idx]
-            
-            # Place barcodes
-            for i, barcode_file in enumerate(page_barcodes):
-                row = i // barcodes_per_row
-                col = i % barcodes_per_row
-                
-                x = margin_x + col * (barcode_width + margin_x)
-                y = page_height - margin_y - (row + 1) * (barcode_height + margin_y)
-                
-                try:
-                    c.drawImage(barcode_file, x, y, width=barcode_width, height=barcode_height)
-                except Exception as e:
-                    print(f"Error adding {barcode_file}: {e}")
-            
-            # Add header and page info
-            c.setFont("Helvetica-Bold", 12)
-            c.drawString(50, page_height - 20, f"{folder_name.replace('_', ' ').title()} - Barcodes")
-            
-            c.setFont("Helvetica", 8)
-            c.drawString(10, 10, f"Page {page_num + 1} of {total_pages} | {folder_name} | {len(barcode_files)} total barcodes")
-            
-            if page_num < total_pages - 1:
+        try:
+            image = render_label_image(item.barcode, item.price, item.name, template)
+        except Exception as e:
+            print(f"Error rendering {item.sku} - {item.name}: {e}")
+            continue
+        yield f"{item.sku}-{item.barcode}", image
+
+
+def vector_label_font():
+    """Register the label TrueType font with ReportLab once per process.
+
+    Returns:
+        tuple: (font_name, currency) where currency is the price prefix the font
+        can draw; Helvetica, the fallback, has no peso sign
+    """
+    from main import resolve_font_path
+
+    font_path = resolve_font_path()
+    if font_path:
+        try:
+            if 'LabelFont' not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(TTFont('LabelFont', font_path))
+            return 'LabelFont', '₱'
+        except Exception:
+            pass
+    return 'Helvetica', 'PHP '
+
+
+def vector_label(barcode_number, price, item_name, font_name='Helvetica', currency='₱'):
+    """Build a label that draws itself as PDF vector primitives.
+
+    The Code128 modules are encoded up front, so an invalid barcode raises
+    here rather than halfway through drawing a page.
+
+    Args:
+        barcode_number (str): The barcode number to encode
+        price (str): The item price to display
+        item_name (str): The item name printed above the barcode
+        font_name (str): ReportLab font for the text, see vector_label_font
+        currency (str): Prefix drawn before the price
+
+    Returns:
+        callable: draw(c, width, height) drawing the label with its bottom-left
+        corner at the canvas origin
+    """
+    from main import BARCODE_OPTIONS, truncate_text
+
+    modules = barcode.Code128(barcode_number).build()[0]
+    display_name = truncate_text(item_name, 28)
+    price_text = f"{currency}{price}" if price else None
+
+    def draw(c, width, height):
+        quiet_zone = BARCODE_OPTIONS['quiet_zone'] * mm
+        module_width = min(BARCODE_OPTIONS['module_width'] * mm, (width - 2 * quiet_zone) / len(modules))
+        bar_height = BARCODE_OPTIONS['module_height'] * mm
+        bars_top = height - 5 * mm
+        x = (width - len(modules) * module_width) / 2
+
+        c.setFillColorRGB(0, 0, 0)
+        for module, run in itertools.groupby(modules):
+            run_width = len(list(run)) * module_width
+            if module == '1':
+                c.rect(x, bars_top - bar_height, run_width, bar_height, stroke=0, fill=1)
+            x += run_width
+
+        # Shrink long names rather than letting them run off the label
+        name_size = min(VECTOR_NAME_FONT_SIZE,
+                        VECTOR_NAME_FONT_SIZE * (width - 2 * mm) / max(pdfmetrics.stringWidth(display_name, font_name, VECTOR_NAME_FONT_SIZE), 1))
+        c.setFont(font_name, name_size)
+        c.drawCentredString(width / 2, height - 3.5 * mm, display_name)
+
+        c.setFont(font_name, VECTOR_DIGITS_FONT_SIZE)
+        c.drawCentredString(width / 2, bars_top - bar_height - 2.5 * mm, barcode_number)
+
+        if price_text:
+            c.setFont(font_name, VECTOR_PRICE_FONT_SIZE)
+            c.drawCentredString(width / 2, bars_top - bar_height - 7.5 * mm, price_text)
+
+    return draw
+
+
+def iter_vector_labels(csv_file="items.csv"):
+    """Yield (key, draw) for every item in items.csv as vector labels.
+
+    Nothing is rasterized: bars and text go into the PDF as primitives, so
+    the sheets are small, quick to build and sharp at any printer resolution.
+    """
+    font_name, currency = vector_label_font()
+    for item in load_catalog(csv_file):
+        if not item.barcode:
+            continue
+        try:
+            draw = vector_label(item.barcode, item.price, item.name, font_name, currency)
+        except Exception as e:
+            print(f"Error encoding {item.sku} - {item.name}: {e}")
+            continue
+        yield f"{item.sku}-{item.barcode}", draw
+
+
+def create_barcode_sheets_streaming(labels, output_filename="barcode_sheets.pdf", sheet="a4_4x5"):
+    """Create PDF sheets from a stream of labels, writing pages as they fill up.
+
+    Unlike create_barcode_sheets this never builds a list of every label,
+    so it can consume a generator of any length. Each distinct label is
+    embedded once as a PDF form XObject and referenced from every slot it
+    appears in, so printing the same SKU many times costs one image.
+
+    Args:
+        labels (iterable): (key, source) pairs where source is a PNG path, a
+            file object holding a PNG, a PIL image or a draw(c, width, height)
+            callable (see vector_label); labels sharing a key must look the same
+        output_filename (str): Name of the output PDF file
+        sheet (str): Name of the sheet template in SHEET_TEMPLATES
+
+    Returns:
+        int: Number of labels placed on the sheets
+    """
+    layout = sheet_template_layout(sheet)
+    barcode_width = layout['barcode_width']
+    barcode_height = layout['barcode_height']
+    slots = layout['slots']
+
+    c = canvas.Canvas(output_filename, pagesize=layout['page_size'], pageCompression=1)
+    forms = {}
+    placed = 0
+    page_num = 0
+
+    for key, source in labels:
+        form_name = forms.get(key)
+        if form_name is None:
+            form_name = f"label{len(forms)}"
+            try:
+                if callable(source):
+                    c.beginForm(form_name, 0, 0, barcode_width, barcode_height)
+                    source(c, barcode_width, barcode_height)
+                else:
+                    image = ImageReader(source)
+                    c.beginForm(form_name, 0, 0, barcode_width, barcode_height)
+                    c.drawImage(image, 0, 0, width=barcode_width, height=barcode_height)
+                c.endForm()
+            except Exception as e:
+                print(f"Error adding {key}: {e}")
+                continue
+            forms[key] = form_name
+
+        # Only start a page once there is a usable label to put on it
+        slot = placed % len(slots)
+        if slot == 0:
+            if page_num:
                 c.showPage()
-        
-        c.save()
-        print(f"Created: {output_filename}")
+            page_num += 1
+            if page_num % 50 == 0:
+                print(f"Processing page {page_num}")
+        x, y = slots[slot]
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(form_name)
+        c.restoreState()
+        placed += 1
+
+        if slot == len(slots) - 1:
+            c.setFont("Helvetica", 8)
+            c.drawString(10, 10, f"Page {page_num} | Generated from Ant's Corner inventory")
 
-def main():
+    if not placed:
+        print("No labels to place.")
+        return 0
+
+    if placed % len(slots):
+        c.setFont("Helvetica", 8)
+        c.drawString(10, 10, f"Page {page_num} | Generated from Ant's Corner inventory")
+
+    c.save()
+    print(f"\nPDF created successfully: {output_filename}")
+    print(f"Total barcodes: {placed} ({len(forms)} distinct)")
+    print(f"Pages: {page_num}")
+    print(f"Layout: {layout['barcodes_per_row']} x {layout['barcodes_per_col']} barcodes per page")
+    return placed
+
+
+def load_restock_state(state_file=RESTOCK_STATE_FILE):
+    """Load the stock levels recorded by the previous restock run ({sku: in_stock})."""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_restock_state(items, state_file=RESTOCK_STATE_FILE):
+    """Record current stock levels so the next 'delta' run only prints new stock."""
+    state = {item.sku: item.in_stock for item in items if item.sku and item.in_stock is not None}
+    tmp_path = state_file + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, state_file)
+
+
+def restock_quantities(items, basis="stock", previous=None, max_per_sku=100):
+    """Work out how many labels each item needs.
+
+    Args:
+        items (list): Catalog items
+        basis (str): 'stock' prints one label per unit in stock, 'delta' one per
+            unit added since the previous run (all stock for unseen SKUs)
+        previous (dict): {sku: in_stock} from the previous run, used by 'delta'
+        max_per_sku (int): Upper bound on labels for a single SKU
+
+    Returns:
+        list: (item, quantity) pairs with quantity > 0, in catalog order
+    """
+    previous = previous or {}
+    plan = []
+    for item in items:
+        if not item.barcode or item.in_stock is None:
+            continue
+        quantity = item.in_stock
+        if basis == "delta":
+            quantity -= previous.get(item.sku, 0) or 0
+        # Fractional stock (sold by weight) still needs a label per container
+        quantity = min(math.ceil(quantity), max_per_sku)
+        if quantity > 0:
+            plan.append((item, quantity))
+    return plan
+
+
+def iter_restock_labels(plan, root=".", store_path=None, template="standard"):
+    """Yield (key, source) for a restock plan, repeating each label by reference.
+
+    Each distinct label is loaded from its generated PNG (or from the label
+    store when store_path is given), or rendered in memory once with the
+    label template when there is none, and then repeated quantity times; the
+    streaming builder embeds it into the PDF only once.
+    """
+    from main import clean_filename, render_label_image
+
+    store = LabelStore(store_path, readonly=True) if store_path else None
+    # A template's output folder does not exist until main.py renders it
+    label_files = dict(iter_label_files(root)) if not store and os.path.isdir(root) else {}
+    for item, quantity in plan:
+        key = clean_filename(f"{item.sku}-{item.barcode}")
+        if store:
+            folder = clean_filename(item.category) if item.category else "Uncategorized"
+            png = store.get(f"{folder}/{key}.png")
+            source = io.BytesIO(png) if png is not None else None
+        else:
+            source = label_files.get(key)
+        if source is None:
+            try:
+                source = render_label_image(item.barcode, item.price, item.name, template)
+            except Exception as e:
+                print(f"Error rendering {item.sku} - {item.name}: {e}")
+                continue
+        for _ in range(quantity):
+            yield key, source
+
+
+def create_restock_sheets(output_filename="restock_labels.pdf", basis="stock", max_per_sku=100, csv_file="items.csv",
+                          store_path=None, template="standard", sheet="a4_4x5"):
+    """Create sheets with as many labels per SKU as its stock level calls for.
+
+    Args:
+        output_filename (str): Name of the output PDF file
+        basis (str): 'stock' or 'delta', see restock_quantities
+        max_per_sku (int): Upper bound on labels for a single SKU
+        csv_file (str): Path of items.csv
+        store_path (str): Label store to take the labels from instead of the folders
+        template (str): Label template of the labels
+        sheet (str): Sheet template to lay them out with
+
+    The stock levels are saved for the next delta run whenever the run
+    succeeds: after the PDF is written, or when no item needs labels.
+
+    Returns:
+        int: Number of labels placed on the sheets
+    """
+    items = load_catalog(csv_file)
+    previous = load_restock_state() if basis == "delta" else None
+    plan = restock_quantities(items, basis=basis, previous=previous, max_per_sku=max_per_sku)
+    if not plan:
+        # Still record the levels, so a later delta run counts from these
+        save_restock_state(items)
+        print("No items need labels.")
+        return 0
+
+    print(f"Restocking {len(plan)} SKUs, {sum(quantity for _, quantity in plan)} labels")
+    labels = iter_restock_labels(plan, root=get_label_template(template)['output_dir'], store_path=store_path,
+                                 template=template)
+    placed = create_barcode_sheets_streaming(labels, output_filename, sheet=sheet)
+    if placed:
+        save_restock_state(items)
+    return placed
+
+
+def parse_args(argv=None):
+    """Parse command line options; without --mode the interactive menu is shown."""
+    parser = argparse.ArgumentParser(description="Create printable PDF sheets of barcode labels.")
+    parser.add_argument('--mode', choices=['all', 'category', 'both', 'csv', 'restock', 'vector'],
+                        help="all: one PDF with every barcode, category: one PDF per category, "
+                             "both: all + category, csv: one PDF rendered straight from items.csv, "
+                             "restock: labels repeated per unit in stock, "
+                             "vector: one PDF from items.csv drawn as vectors (no PNGs)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for category PDFs (0 = one per CPU core, default: 1)")
+    parser.add_argument('--quantity-from', choices=['stock', 'delta'], default='stock',
+                        help="restock: one label per unit in stock, or per unit added since the last restock run")
+    parser.add_argument('--max-per-sku', type=int, default=100,
+                        help="restock: most labels printed for a single SKU (default: 100)")
+    parser.add_argument('--store',
+                        help="Read labels from this label store (written by `main.py --store`) instead of the category folders")
+    parser.add_argument('--template', choices=sorted(LABEL_TEMPLATES), default='standard',
+                        help="Label template to lay out (default: standard)")
+    parser.add_argument('--sheet', choices=sorted(SHEET_TEMPLATES),
+                        help="Sheet template (default: the label template's usual sheet)")
+    return parser.parse_args(argv)
+
+
+MODE_CHOICES = {'1': 'all', '2': 'category', '3': 'both', '4': 'csv', '5': 'restock', '6': 'vector'}
+
+
+def main(mode=None, workers=1, quantity_from="stock", max_per_sku=100, store_path=None, template="standard", sheet=None):
+    """Create the requested PDFs, prompting for the mode when none is given."""
     print("Barcode PDF Generator")
     print("====================\n")
     
-    choice = input("Choose an option:\n1. Create one PDF with all barcodes\n2. Create separate PDFs by category\n3. Both\nEnter choice (1/2/3): ").strip()
+    sheet_name = sheet or DEFAULT_SHEETS[template]
+    if get_sheet_template(sheet_name)['label_template'] != template:
+        print(f"Error: sheet {sheet_name} is laid out for {get_sheet_template(sheet_name)['label_template']} labels, not {template}.")
+        return
+    if template != 'standard' and (store_path or mode == 'vector'):
+        print("Error: the label store and vector mode only support standard labels.")
+        return
+    root = get_label_template(template)['output_dir']
+    suffix = "" if template == "standard" else f"_{template}"
+    # Small categories fit on one regular page; larger ones use the denser standard sheet
+    category_sheets = ("a4_4x5", "a4_4x9") if sheet is None and template == "standard" else (sheet_name, sheet_name)
+    
+    if mode is None:
+        choice = input("Choose an option:\n1. Create one PDF with all barcodes\n2. Create separate PDFs by category\n3. Both\n4. Create one PDF straight from items.csv (no PNGs needed)\n5. Create restock labels (one per unit in stock)\n6. Create one vector PDF straight from items.csv (smallest, sharpest)\nEnter choice (1/2/3/4/5/6): ").strip()
+        mode = MODE_CHOICES.get(choice)
     
-    if choice in ['1', '3']:
+    if mode in ['all', 'both']:
+        start = time.perf_counter()
         print("\nCreating combined PDF...")
-        create_barcode_sheets("all_barcodes.pdf")
+        if store_path:
+            labels = ((key, source) for _, key, source in iter_store_labels(store_path))
+            create_barcode_sheets_streaming(labels, "all_barcodes.pdf", sheet=sheet_name)
+        else:
+            create_barcode_sheets(f"all_barcodes{suffix}.pdf", sheet=sheet_name, root=root)
+        print(f"Combined PDF finished in {time.perf_counter() - start:.2f}s")
     
-    if choice in ['2', '3']:
+    if mode in ['category', 'both']:
         print("\nCreating category-specific PDFs...")
-        create_category_sheets()
+        if store_path:
+            create_store_category_sheets(store_path)
+        else:
+            create_category_sheets(workers=workers, root=root, sheets=category_sheets)
+    
+    if mode == 'csv':
+        start = time.perf_counter()
+        print("\nCreating combined PDF from items.csv...")
+        create_barcode_sheets_streaming(iter_catalog_labels(template=template), f"all_barcodes{suffix}.pdf", sheet=sheet_name)
+        print(f"Combined PDF finished in {time.perf_counter() - start:.2f}s")
+    
+    if mode == 'vector':
+        start = time.perf_counter()
+        print("\nCreating vector PDF from items.csv...")
+        create_barcode_sheets_streaming(iter_vector_labels(), "all_barcodes_vector.pdf", sheet=sheet_name)
+        print(f"Vector PDF finished in {time.perf_counter() - start:.2f}s")
+    
+    if mode == 'restock':
+        start = time.perf_counter()
+        print(f"\nCreating restock PDF (quantities from {quantity_from})...")
+        create_restock_sheets(f"restock_labels{suffix}.pdf", basis=quantity_from, max_per_sku=max_per_sku,
+                              store_path=store_path, template=template, sheet=sheet_name)
+        print(f"Restock PDF finished in {time.perf_counter() - start:.2f}s")
     
     print("\nDone! You can now print the PDF files.")
     print("\nPrinting tips:")
     print("- Use 'Actual Size' or '100%' scaling when printing")
     print("- Do NOT use 'Fit to Page' as it will change barcode dimensions")
-    print("- Each barcode should print as 50mm x 30mm")
+    width_mm, height_mm = get_label_template(template)['size_mm']
+    print(f"- Each barcode should print as {width_mm}mm x {height_mm}mm")
     print("- Use good quality white paper for best scanner readability")
 
 if __name__ == "__main__":
-    main()
-
+    args = parse_args()
+    main(mode=args.mode, workers=args.workers, quantity_from=args.quantity_from, max_per_sku=args.max_per_sku,
+         store_path=args.store, template=args.template, sheet=args.sheet)
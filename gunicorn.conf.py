@@ -0,0 +1,32 @@
+"""Gunicorn settings for serving the barcode finder (see wsgi.py).
+
+The app is loaded once in the master process, so the label and catalog
+indexes are built a single time and shared with every worker through
+copy-on-write memory instead of being rebuilt per worker. Each worker then
+starts its own index refresher, since threads do not survive the fork.
+
+Every setting can be overridden from the environment:
+BARCODE_BIND, BARCODE_WORKERS and BARCODE_THREADS.
+"""
+import gc
+import multiprocessing
+import os
+
+# Local only by default; set BARCODE_BIND=0.0.0.0:5000 to serve other machines
+bind = os.environ.get('BARCODE_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('BARCODE_WORKERS', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get('BARCODE_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+accesslog = '-'
+
+
+def when_ready(server):
+    # Move the preloaded indexes out of the collector's reach so that GC passes
+    # in the workers do not touch (and so copy) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    app.start_index_refresher()
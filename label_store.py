@@ -0,0 +1,233 @@
+"""Packed label store: every label PNG in one SQLite file.
+
+Instead of one PNG per SKU spread over the category folders, labels can be
+kept as blobs in a single table keyed by the same relative path the folders
+would use (e.g. Beverages/10336-4800049720114.png). main.py writes into it,
+and app.py and create_print_sheets.py read from it without walking folders
+or opening one file per label. Each label's thumbnail is kept in a second
+table under the same path.
+
+Usage:
+    python label_store.py export labels.sqlite [destination]
+    python label_store.py import labels.sqlite [source]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    path TEXT PRIMARY KEY,
+    sku TEXT NOT NULL,
+    hash TEXT NOT NULL DEFAULT '',
+    png BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS labels_sku ON labels (sku);
+CREATE TABLE IF NOT EXISTS thumbnails (
+    path TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+# main.py's manifest of rendered label folders (see main.MANIFEST_FILE)
+MANIFEST_FILE = '.label_manifest.json'
+
+
+def label_filename_sku(file_name):
+    """Return the SKU a label file ("<sku>-<barcode>.png") was written for.
+
+    SKUs may contain dashes themselves (e.g. 1523-1), so the SKU is
+    everything before the last dash.
+    """
+    return file_name.rsplit('-', 1)[0].strip()
+
+
+class LabelStore:
+    """A SQLite file holding label PNGs by relative path.
+
+    Connections are per thread, so one store can be shared by the web app's
+    request threads.
+
+    Args:
+        db_path (str): Path of the SQLite file
+        readonly (bool): Open without write access (the file must exist)
+    """
+
+    def __init__(self, db_path, readonly=False):
+        self.db_path = db_path
+        self.readonly = readonly
+        self._local = threading.local()
+        if not readonly:
+            with self._connection() as connection:
+                connection.executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.readonly:
+                uri = 'file:' + os.path.abspath(self.db_path) + '?mode=ro'
+                connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            else:
+                connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._local.connection = connection
+        return connection
+
+    def _write(self, sql, parameters):
+        connection = self._connection()
+        if getattr(self._local, 'in_batch', False):
+            connection.execute(sql, parameters)
+        else:
+            with connection:
+                connection.execute(sql, parameters)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Group every write made in the block into one transaction.
+
+        Committing per label dominates a full run; a batch commits once at
+        the end (or rolls back if the block raises).
+        """
+        connection = self._connection()
+        self._local.in_batch = True
+        try:
+            with connection:
+                yield self
+        finally:
+            self._local.in_batch = False
+
+    def put(self, path, sku, png, content_hash=''):
+        """Insert or replace the label stored at path."""
+        self._write('INSERT OR REPLACE INTO labels (path, sku, hash, png) VALUES (?, ?, ?, ?)',
+                    (path, sku, content_hash, sqlite3.Binary(png)))
+
+    def get(self, path):
+        """Return the PNG bytes stored at path, or None."""
+        row = self._connection().execute('SELECT png FROM labels WHERE path = ?', (path,)).fetchone()
+        return row[0] if row else None
+
+    def contains(self, path):
+        row = self._connection().execute('SELECT 1 FROM labels WHERE path = ?', (path,)).fetchone()
+        return row is not None
+
+    def delete(self, path):
+        self._write('DELETE FROM labels WHERE path = ?', (path,))
+        self._write('DELETE FROM thumbnails WHERE path = ?', (path,))
+
+    def move(self, old_path, new_path):
+        self.delete(new_path)
+        self._write('UPDATE labels SET path = ? WHERE path = ?', (new_path, old_path))
+        self._write('UPDATE thumbnails SET path = ? WHERE path = ?', (new_path, old_path))
+
+    def put_thumbnail(self, path, data):
+        """Insert or replace the thumbnail of the label stored at path."""
+        self._write('INSERT OR REPLACE INTO thumbnails (path, data) VALUES (?, ?)', (path, sqlite3.Binary(data)))
+
+    def get_thumbnail(self, path):
+        """Return the thumbnail bytes of the label stored at path, or None."""
+        try:
+            row = self._connection().execute('SELECT data FROM thumbnails WHERE path = ?', (path,)).fetchone()
+        except sqlite3.OperationalError:
+            # Opened read-only, a store written before thumbnails existed has no table
+            return None
+        return row[0] if row else None
+
+    def paths_without_thumbnail(self):
+        """Return the paths of stored labels that have no thumbnail."""
+        rows = self._connection().execute(
+            'SELECT labels.path FROM labels LEFT JOIN thumbnails ON thumbnails.path = labels.path '
+            'WHERE thumbnails.path IS NULL ORDER BY labels.path')
+        return [path for path, in rows]
+
+    def manifest(self):
+        """Return {path: {'sku': ..., 'hash': ...}} in the format main.py's manifest uses."""
+        rows = self._connection().execute('SELECT path, sku, hash FROM labels')
+        return {path: {'sku': sku, 'hash': content_hash} for path, sku, content_hash in rows}
+
+    def sku_index(self):
+        """Return {sku: path} for every stored label."""
+        return {sku: path for path, sku in self._connection().execute('SELECT path, sku FROM labels ORDER BY path')}
+
+    def iter_labels(self):
+        """Yield (path, png bytes) for every stored label, in path order."""
+        for path, png in self._connection().execute('SELECT path, png FROM labels ORDER BY path'):
+            yield path, png
+
+    def export(self, destination='.'):
+        """Write every stored label out as a PNG under destination.
+
+        Thumbnails are not exported; the next main.py run recreates them.
+
+        Returns:
+            int: Number of files written
+        """
+        count = 0
+        for path, png in self.iter_labels():
+            target = os.path.join(destination, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(png)
+            count += 1
+        return count
+
+    def import_folders(self, source='.'):
+        """Pack the category folders' PNGs (as written by main.py) into the store.
+
+        Content hashes are taken from main.py's manifest when one is present,
+        so the next ``main.py --store`` run does not re-render every label.
+
+        Returns:
+            int: Number of labels imported
+        """
+        try:
+            with open(os.path.join(source, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        count = 0
+        folders = sorted((entry for entry in os.scandir(source) if entry.is_dir() and not entry.name.startswith('.')),
+                         key=lambda entry: entry.name)
+        with self.batch():
+            for folder in folders:
+                for entry in sorted(os.scandir(folder.path), key=lambda entry: entry.name):
+                    if not entry.is_file() or not entry.name.endswith('.png') or '-' not in entry.name:
+                        continue
+                    with open(entry.path, 'rb') as f:
+                        png = f.read()
+                    path = f"{folder.name}/{entry.name}"
+                    content_hash = manifest.get(path, {}).get('hash') or ''
+                    self.put(path, label_filename_sku(entry.name), png, content_hash)
+                    count += 1
+        return count
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import a packed label store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help="Write the store's labels out as category folders of PNGs")
+    export_parser.add_argument('store', help="Path of the label store")
+    export_parser.add_argument('destination', nargs='?', default='.', help="Folder to export into (default: .)")
+    import_parser = subparsers.add_parser('import', help="Pack existing category folders of PNGs into the store")
+    import_parser.add_argument('store', help="Path of the label store")
+    import_parser.add_argument('source', nargs='?', default='.', help="Folder holding the category folders (default: .)")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        count = LabelStore(args.store, readonly=True).export(args.destination)
+        print(f"Exported {count} labels to {args.destination}")
+    else:
+        count = LabelStore(args.store).import_folders(args.source)
+        print(f"Imported {count} labels into {args.store}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Declarative label and sheet templates.
+
+A label template describes one kind of label: its physical size and DPI,
+the barcode symbology and writer options, which fields are printed and the
+spacing around them. A sheet template describes how labels of one template
+are laid out on a page. main.py and create_print_sheets.py resolve a
+template once per run and reuse the result for every item.
+
+Label template keys:
+    description (str): Shown in --help
+    size_mm (tuple): Final label width and height in millimetres
+    dpi (int): Resolution of the rendered PNG
+    symbology (str): python-barcode symbology, e.g. 'code128', 'ean13', 'ean8' or 'upca'
+    fields (tuple): Any of 'name', 'barcode_text' (digits under the bars) and 'price'
+    barcode (dict): python-barcode writer options (module_width, module_height,
+        quiet_zone, font_size, text_distance)
+    name_font_size / price_font_size (int): Font sizes in pixels before scaling
+    name_max_length (int): Names longer than this are truncated with an ellipsis
+    name_y (int): Top of the name, in pixels from the top of the label
+    top_margin (int): Pixels added above the barcode for the name
+    bottom_margin / bottom_margin_no_price (int): Pixels added below the barcode
+    price_offset (int): Top of the price, in pixels below the bottom of the barcode
+    output_dir (str): Where main.py writes this template's category folders
+"""
+
+MM_PER_INCH = 25.4
+
+LABEL_TEMPLATES = {
+    'standard': {
+        'description': "50 x 30 mm price label (the original layout)",
+        'size_mm': (50, 30),
+        'dpi': 150,
+        'symbology': 'code128',
+        'fields': ('name', 'barcode_text', 'price'),
+        'barcode': {
+            'module_width': 0.4,
+            'module_height': 10.0,  # Reduced barcode height
+            'quiet_zone': 4.0,
+            'font_size': 12,
+            'text_distance': 5.0,
+        },
+        'name_font_size': 16,
+        'price_font_size': 18,
+        'name_max_length': 28,
+        'name_y': 5,
+        'top_margin': 30,
+        'bottom_margin': 35,
+        'bottom_margin_no_price': 15,
+        'price_offset': 12,
+        'output_dir': '.',
+    },
+    'shelf_tag': {
+        'description': "70 x 38 mm shelf edge tag with a large price",
+        'size_mm': (70, 38),
+        'dpi': 150,
+        'symbology': 'code128',
+        'fields': ('name', 'barcode_text', 'price'),
+        'barcode': {
+            'module_width': 0.4,
+            'module_height': 9.0,
+            'quiet_zone': 4.0,
+            'font_size': 10,
+            'text_distance': 4.0,
+        },
+        'name_font_size': 18,
+        'price_font_size': 34,
+        'name_max_length': 32,
+        'name_y': 6,
+        'top_margin': 34,
+        'bottom_margin': 58,
+        'bottom_margin_no_price': 12,
+        'price_offset': 10,
+        'output_dir': 'shelf_tags',
+    },
+    'jar_sticker': {
+        'description': "30 x 20 mm sticker for jars and small packs (no price)",
+        'size_mm': (30, 20),
+        'dpi': 200,
+        'symbology': 'code128',
+        'fields': ('name', 'barcode_text'),
+        'barcode': {
+            'module_width': 0.25,
+            'module_height': 7.0,
+            'quiet_zone': 2.0,
+            'font_size': 8,
+            'text_distance': 3.0,
+        },
+        'name_font_size': 16,
+        'price_font_size': 16,
+        'name_max_length': 20,
+        'name_y': 3,
+        'top_margin': 24,
+        'bottom_margin': 10,
+        'bottom_margin_no_price': 10,
+        'price_offset': 6,
+        'output_dir': 'jar_stickers',
+    },
+}
+
+# Page sizes are names of reportlab.lib.pagesizes constants. The top and
+# bottom margins keep labels clear of the page header (drawn 20 pt below the
+# top edge in category mode) and the page footer (10 pt above the bottom).
+SHEET_TEMPLATES = {
+    'a4_4x5': {'page_size': 'A4', 'columns': 4, 'rows': 5, 'label_template': 'standard',
+               'top_margin_mm': 10, 'bottom_margin_mm': 7},
+    'a4_4x9': {'page_size': 'A4', 'columns': 4, 'rows': 9, 'label_template': 'standard',
+               'top_margin_mm': 10, 'bottom_margin_mm': 7},
+    'a4_shelf_tags': {'page_size': 'A4', 'columns': 2, 'rows': 7, 'label_template': 'shelf_tag',
+                      'top_margin_mm': 10, 'bottom_margin_mm': 7},
+    'a4_jar_stickers': {'page_size': 'A4', 'columns': 6, 'rows': 13, 'label_template': 'jar_sticker',
+                        'top_margin_mm': 10, 'bottom_margin_mm': 7},
+}
+
+# Sheet used for a label template when none is asked for
+DEFAULT_SHEETS = {
+    'standard': 'a4_4x5',
+    'shelf_tag': 'a4_shelf_tags',
+    'jar_sticker': 'a4_jar_stickers',
+}
+
+
+def get_label_template(name):
+    """Return the label template called name.
+
+    Raises:
+        ValueError: If there is no such template
+    """
+    try:
+        return LABEL_TEMPLATES[name]
+    except KeyError:
+        raise ValueError(f"Unknown label template: {name} (choose from {', '.join(LABEL_TEMPLATES)})") from None
+
+
+def get_sheet_template(name):
+    """Return the sheet template called name.
+
+    Raises:
+        ValueError: If there is no such template
+    """
+    try:
+        return SHEET_TEMPLATES[name]
+    except KeyError:
+        raise ValueError(f"Unknown sheet template: {name} (choose from {', '.join(SHEET_TEMPLATES)})") from None
+
+
+def label_pixel_size(template):
+    """Return the (width, height) in pixels of a label template at its DPI."""
+    width_mm, height_mm = template['size_mm']
+    return (round(width_mm / MM_PER_INCH * template['dpi']),
+            round(height_mm / MM_PER_INCH * template['dpi']))
+
+
+def template_output_dirs():
+    """Return the output folders of every template that does not write to the top level."""
+    return {template['output_dir'] for template in LABEL_TEMPLATES.values() if template['output_dir'] != '.'}
@@ -1,9 +1,58 @@
-import csv
+import argparse
+import contextlib
+import hashlib
+import heapq
+import io
+import json
 import barcode
 from barcode.writer import ImageWriter
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, features
 import os
 import re
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from catalog import load_catalog
+from label_store import LabelStore
+from label_templates import LABEL_TEMPLATES, get_label_template, label_pixel_size
+from metrics import NULL_TIMER, StageTimer
+
+
+# Barcode writer options of the standard label
+BARCODE_OPTIONS = dict(LABEL_TEMPLATES['standard']['barcode'], background='white', foreground='black',
+                       dpi=LABEL_TEMPLATES['standard']['dpi'])
+
+# Final standard label size (50mm x 30mm ≈ 295x177 pixels at 150 DPI)
+LABEL_SIZE = label_pixel_size(LABEL_TEMPLATES['standard'])
+LABEL_DPI = LABEL_TEMPLATES['standard']['dpi']
+
+# Fonts tried in order for label text (macOS, Linux, Windows)
+FONT_SEARCH_PATHS = (
+    '/System/Library/Fonts/Arial.ttf',
+    '/System/Library/Fonts/Supplemental/Arial.ttf',
+    '/Library/Fonts/Arial.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/TTF/DejaVuSans.ttf',
+    'C:\\Windows\\Fonts\\arial.ttf',
+)
+
+# Manifest of rendered labels, stored next to the category folders
+MANIFEST_FILE = '.label_manifest.json'
+
+# Small previews for the web app's result lists, kept in a hidden folder next
+# to the labels so nothing looking for *.png labels picks them up
+THUMBNAIL_DIR = '.thumbs'
+THUMBNAIL_WIDTH = 160
+THUMBNAIL_FORMAT = 'WEBP' if features.check('webp') else 'PNG'
+THUMBNAIL_EXTENSION = '.webp' if THUMBNAIL_FORMAT == 'WEBP' else '.png'
+
+# Validation issue kinds that mean labels or lookups would come out wrong;
+# anything else is informational
+VALIDATION_ERRORS = ('duplicate_sku', 'duplicate_barcode', 'filename_collision', 'checksum', 'invalid_barcode')
 
 
 def clean_filename(filename):
@@ -21,7 +70,266 @@ def truncate_text(text, max_length=20):
     return text
 
 
-def generate_barcode_image(folder, barcode_number, price, sku, item_name):
+class LabelRenderer:
+    """Renders barcode labels of one template, reusing fonts, the barcode writer and text metrics.
+
+    Creating a renderer resolves the template's fonts, symbology, writer
+    options and geometry once; a single instance is meant to be shared
+    across every row of a batch run.
+
+    Args:
+        font_path (str): TrueType font to use; when omitted the BARCODE_FONT
+            environment variable and then FONT_SEARCH_PATHS are tried
+        name_font_size (int): Font size of the item name (default: the template's)
+        price_font_size (int): Font size of the price (default: the template's)
+        profile (bool): Time each stage of the pipeline in self.timer
+        template (str): Name of the label template in LABEL_TEMPLATES
+    """
+
+    max_cached_metrics = 8192
+
+    def __init__(self, font_path=None, name_font_size=None, price_font_size=None, profile=False, template='standard'):
+        self.template_name = template
+        self.template = get_label_template(template)
+        self.font_path = resolve_font_path(font_path)
+        self.name_font_size = name_font_size or self.template['name_font_size']
+        self.price_font_size = price_font_size or self.template['price_font_size']
+        self.name_font = self._load_font(self.name_font_size)
+        self.price_font = self._load_font(self.price_font_size)
+        self._writer = ImageWriter()
+        self._measure = ImageDraw.Draw(Image.new('RGB', (1, 1), 'white'))
+        self._text_widths = {}
+        self.timer = StageTimer() if profile else NULL_TIMER
+
+        # Geometry that is the same for every label of the template
+        fields = self.template['fields']
+        self.show_name = 'name' in fields
+        self.show_price = 'price' in fields
+        self.dpi = self.template['dpi']
+        self.label_size = label_pixel_size(self.template)
+        self.barcode_class = barcode.get_barcode_class(self.template['symbology'])
+        self.barcode_options = dict(self.template['barcode'], background='white', foreground='black', dpi=self.dpi)
+        if 'barcode_text' not in fields:
+            self.barcode_options['write_text'] = False
+
+    def __getstate__(self):
+        # Fonts are rebuilt on unpickling so the renderer can be handed to worker processes
+        return {
+            'font_path': self.font_path,
+            'name_font_size': self.name_font_size,
+            'price_font_size': self.price_font_size,
+            'profile': self.timer.enabled,
+            'template': self.template_name,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _load_font(self, size):
+        if self.font_path:
+            try:
+                return ImageFont.truetype(self.font_path, size)
+            except OSError:
+                pass
+        return ImageFont.load_default()
+
+    def options_key(self):
+        """Return everything about this renderer that affects the rendered pixels."""
+        return [self.font_path, self.name_font_size, self.price_font_size,
+                self.barcode_options, self.label_size, self.dpi, self.template]
+
+    def text_width(self, text, font):
+        """Measure the rendered width of text, caching the result."""
+        key = (id(font), text)
+        width = self._text_widths.get(key)
+        if width is None:
+            if len(self._text_widths) >= self.max_cached_metrics:
+                self._text_widths.clear()
+            bbox = self._measure.textbbox((0, 0), text, font=font)
+            width = bbox[2] - bbox[0]
+            self._text_widths[key] = width
+        return width
+
+    def render(self, barcode_number, price, item_name):
+        """Render a barcode label entirely in memory.
+
+        Args:
+            barcode_number (str): The barcode number to generate
+            price (str): The item price to display
+            item_name (str): The item name printed above the barcode
+
+        Returns:
+            PIL.Image.Image: The final label, resized to the template's size
+        """
+        timer = self.timer
+        template = self.template
+        price = price if self.show_price else None
+
+        # Generate barcode with reduced height for more space for product name
+        with timer.stage('barcode'):
+            code = self.barcode_class(barcode_number, writer=self._writer)
+            image = code.render(dict(self.barcode_options))
+
+        with timer.stage('compose'):
+            # Add extra space at the top for the product name
+            extra_top = template['top_margin']
+            extra_bottom = template['bottom_margin'] if price else template['bottom_margin_no_price']
+            new_image = Image.new('RGB', (image.width, image.height + extra_top + extra_bottom), 'white')
+
+            # Paste barcode below the name
+            new_image.paste(image, (0, extra_top))
+
+        with timer.stage('text'):
+            draw = ImageDraw.Draw(new_image)
+            # Draw product name at the top, centered and truncated if too long
+            if self.show_name:
+                display_name = truncate_text(item_name, template['name_max_length'])
+                name_width = self.text_width(display_name, self.name_font)
+                name_x = (image.width - name_width) // 2
+                draw.text((name_x, template['name_y']), display_name, fill='black', font=self.name_font)
+
+            # Add price at the bottom if available
+            if price:
+                price_text = f"₱{price}"
+                price_width = self.text_width(price_text, self.price_font)
+                price_x = (image.width - price_width) // 2
+                price_y = image.height + extra_top + template['price_offset']
+                draw.text((price_x, price_y), price_text, fill='black', font=self.price_font)
+
+        # Resize to the template's size (50mm x 30mm ≈ 295x177 pixels at 150 DPI for standard labels)
+        with timer.stage('resize'):
+            return new_image.resize(self.label_size, Image.Resampling.LANCZOS)
+
+
+def resolve_font_path(font_path=None):
+    """Pick the TrueType font used for label text.
+
+    Returns the first existing path out of font_path, the BARCODE_FONT
+    environment variable and FONT_SEARCH_PATHS, or None to fall back to
+    Pillow's built-in font.
+    """
+    candidates = [font_path, os.environ.get('BARCODE_FONT')] + list(FONT_SEARCH_PATHS)
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+_default_renderer = None
+_template_renderers = {}
+
+
+def get_default_renderer():
+    """Return the renderer shared by every label rendered in this process."""
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = LabelRenderer()
+    return _default_renderer
+
+
+def set_default_renderer(renderer):
+    """Replace the renderer shared by every label rendered in this process."""
+    global _default_renderer
+    _default_renderer = renderer
+    _template_renderers.clear()
+
+
+def get_renderer(template='standard'):
+    """Return the shared renderer for a label template.
+
+    Renderers for other templates than the default renderer's are created
+    on first use with the default renderer's font and profiling settings.
+    """
+    default = get_default_renderer()
+    if template == default.template_name:
+        return default
+    renderer = _template_renderers.get(template)
+    if renderer is None:
+        renderer = LabelRenderer(font_path=default.font_path, profile=default.timer.enabled, template=template)
+        _template_renderers[template] = renderer
+    return renderer
+
+
+def render_label_image(barcode_number, price, item_name, template='standard'):
+    """Render a barcode label entirely in memory with the template's shared renderer.
+
+    Args:
+        barcode_number (str): The barcode number to generate
+        price (str): The item price to display
+        item_name (str): The item name printed above the barcode
+        template (str): Name of the label template
+
+    Returns:
+        PIL.Image.Image: The final label, resized to the template's size
+    """
+    return get_renderer(template).render(barcode_number, price, item_name)
+
+
+def render_label_png(barcode_number, price, item_name, template='standard'):
+    """Render a barcode label and encode it as PNG without touching disk.
+
+    Args:
+        barcode_number (str): The barcode number to generate
+        price (str): The item price to display
+        item_name (str): The item name printed above the barcode
+        template (str): Name of the label template
+
+    Returns:
+        bytes: The encoded PNG
+    """
+    renderer = get_renderer(template)
+    return encode_label_png(renderer, renderer.render(barcode_number, price, item_name))
+
+
+def render_label_variants(barcode_number, price, item_name, template='standard'):
+    """Render a barcode label once and encode both the print PNG and its thumbnail.
+
+    Args:
+        barcode_number (str): The barcode number to generate
+        price (str): The item price to display
+        item_name (str): The item name printed above the barcode
+        template (str): Name of the label template
+
+    Returns:
+        tuple: (png, thumbnail) encoded bytes
+    """
+    renderer = get_renderer(template)
+    image = renderer.render(barcode_number, price, item_name)
+    png = encode_label_png(renderer, image)
+    with renderer.timer.stage('thumbnail'):
+        thumbnail = encode_label_thumbnail(image)
+    return png, thumbnail
+
+
+def encode_label_png(renderer, image):
+    """Encode a rendered label as a print-resolution PNG."""
+    with renderer.timer.stage('png_encode'):
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG', optimize=True, dpi=(renderer.dpi, renderer.dpi))
+        return buffer.getvalue()
+
+
+def encode_label_thumbnail(image, width=THUMBNAIL_WIDTH):
+    """Shrink a label to a greyscale preview and encode it.
+
+    Args:
+        image (PIL.Image.Image): A rendered label, or a label PNG opened from disk
+        width (int): Thumbnail width in pixels; the height keeps the aspect ratio
+
+    Returns:
+        bytes: The thumbnail as WebP (PNG if Pillow was built without WebP)
+    """
+    height = max(1, round(image.height * width / image.width))
+    thumbnail = image.convert('L').resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    if THUMBNAIL_FORMAT == 'WEBP':
+        thumbnail.save(buffer, 'WEBP', quality=80)
+    else:
+        thumbnail.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def generate_barcode_image(folder, barcode_number, price, sku, item_name, template='standard'):
     """Generates a barcode image optimized for scanner readability.
     
     Args:
@@ -29,139 +337,568 @@ def generate_barcode_image(folder, barcode_number, price, sku, item_name):
         barcode_number (str): The barcode number to generate
         price (str): The item price to display
         sku (str): The SKU for filename
+        item_name (str): The item name printed above the barcode
+        template (str): Name of the label template
+
+    Returns:
+        str: Path of the generated PNG file; its thumbnail is written to
+        label_thumbnail_path() of it
     """
-    # Ensure folder exists
-    os.makedirs(folder, exist_ok=True)
-    
+    timer = get_renderer(template).timer
+
     # Clean filename
     filename = clean_filename(f"{sku}-{barcode_number}")
-    img_path = os.path.join(folder, filename)
-
-    # Generate barcode with reduced height for more space for product name
-    code = barcode.Code128(barcode_number, writer=ImageWriter())
-    options = {
-        'module_width': 0.4,
-        'module_height': 10.0,  # Reduced barcode height
-        'quiet_zone': 4.0,
-        'font_size': 12,
-        'text_distance': 5.0,
-        'background': 'white',
-        'foreground': 'black',
-        'dpi': 150,
-    }
-    barcode_img = code.save(img_path, options=options)
-    image = Image.open(img_path + '.png')
-
-    # Add extra space at the top for the product name
-    extra_top = 30
-    extra_bottom = 35 if price else 15
-    new_image = Image.new('RGB', (image.width, image.height + extra_top + extra_bottom), 'white')
-
-    # Draw product name at the top, centered and truncated if too long
-    draw = ImageDraw.Draw(new_image)
+    final_path = os.path.join(folder, filename) + '.png'
+
+    png, thumbnail = render_label_variants(barcode_number, price, item_name, template)
+
+    with timer.stage('write'):
+        # Ensure folder exists
+        os.makedirs(folder, exist_ok=True)
+        with open(final_path, 'wb') as f:
+            f.write(png)
+        write_label_thumbnail(final_path, thumbnail)
+    return final_path
+
+
+def label_thumbnail_path(label_path):
+    """Return the path of the thumbnail kept for the label PNG at label_path."""
+    folder, file_name = os.path.split(label_path)
+    return os.path.join(folder, THUMBNAIL_DIR, os.path.splitext(file_name)[0] + THUMBNAIL_EXTENSION)
+
+
+def write_label_thumbnail(label_path, thumbnail):
+    """Write the thumbnail bytes of the label PNG at label_path."""
+    thumbnail_path = label_thumbnail_path(label_path)
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    with open(thumbnail_path, 'wb') as f:
+        f.write(thumbnail)
+
+
+def move_label_file(old_path, new_path):
+    """Move a label PNG, and its thumbnail if it has one."""
+    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+    os.replace(old_path, new_path)
+    old_thumbnail = label_thumbnail_path(old_path)
+    if os.path.exists(old_thumbnail):
+        new_thumbnail = label_thumbnail_path(new_path)
+        os.makedirs(os.path.dirname(new_thumbnail), exist_ok=True)
+        os.replace(old_thumbnail, new_thumbnail)
+
+
+def remove_label_file(path):
+    """Delete a label PNG and its thumbnail."""
+    os.remove(path)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(label_thumbnail_path(path))
+
+
+def backfill_thumbnails(paths, store=None):
+    """Create thumbnails for labels that do not have one yet.
+
+    Covers labels rendered before thumbnails existed, and labels whose
+    thumbnail was deleted, without re-rendering them.
+
+    Args:
+        paths (iterable): Label paths to check (ignored with a store, which
+            knows which of its labels lack a thumbnail)
+        store (LabelStore): Label store to read and write instead of files
+
+    Returns:
+        int: Number of thumbnails created
+    """
+    if store:
+        missing = store.paths_without_thumbnail()
+    else:
+        missing = [path for path in paths if not os.path.exists(label_thumbnail_path(path))]
+    for path in missing:
+        source = io.BytesIO(store.get(path)) if store else path
+        with Image.open(source) as image:
+            thumbnail = encode_label_thumbnail(image)
+        if store:
+            store.put_thumbnail(path, thumbnail)
+        else:
+            write_label_thumbnail(path, thumbnail)
+    return len(missing)
+
+
+def label_output_path(job):
+    """Return the PNG path generate_barcode_image writes for a label job."""
+    filename = clean_filename(f"{job['sku']}-{job['barcode_number']}")
+    return os.path.join(job['folder'], filename) + '.png'
+
+
+def label_content_hash(job):
+    """Hash everything that affects the rendered pixels of a label.
+
+    The category is not part of the hash because it only decides the
+    folder; a label whose category changed can be moved instead of
+    re-rendered.
+    """
+    payload = json.dumps([
+        job['sku'], job['item_name'], job['barcode_number'], job['price'],
+        get_renderer(job.get('template', 'standard')).options_key(),
+    ], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def load_manifest(manifest_path=MANIFEST_FILE):
+    """Load the label manifest, returning an empty one if it is missing or unreadable."""
     try:
-        font_name = ImageFont.truetype('/System/Library/Fonts/Arial.ttf', 16)
-    except:
-        font_name = ImageFont.load_default()
-    max_name_length = 28
-    display_name = truncate_text(item_name, max_name_length)
-    name_bbox = draw.textbbox((0, 0), display_name, font=font_name)
-    name_width = name_bbox[2] - name_bbox[0]
-    name_x = (image.width - name_width) // 2
-    name_y = 5
-    draw.text((name_x, name_y), display_name, fill='black', font=font_name)
-
-    # Paste barcode below the name
-    new_image.paste(image, (0, extra_top))
-
-    # Add price at the bottom if available
-    if price:
-        try:
-            font = ImageFont.truetype('/System/Library/Fonts/Arial.ttf', 18)
-        except:
-            font = ImageFont.load_default()
-        price_text = f"₱{price}"
-        price_bbox = draw.textbbox((0, 0), price_text, font=font)
-        price_width = price_bbox[2] - price_bbox[0]
-        price_x = (image.width - price_width) // 2
-        price_y = image.height + extra_top + 12
-        draw.text((price_x, price_y), price_text, fill='black', font=font)
-
-    # Resize to target size (50mm x 30mm ≈ 295x177 pixels at 150 DPI)
-    target_size = (295, 177)
-    resized_image = new_image.resize(target_size, Image.Resampling.LANCZOS)
-    final_path = img_path + '.png'
-    resized_image.save(final_path, 'PNG', optimize=True, dpi=(150, 150))
-    print(f"Generated barcode: {final_path}")
-    temp_file = img_path + '.png'
-    if os.path.exists(temp_file) and temp_file != final_path:
-        os.remove(temp_file)
-
-
-def main():
-    """Main function to process items.csv and generate barcodes organized by category."""
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(manifest, manifest_path=MANIFEST_FILE):
+    """Atomically write the label manifest."""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def gs1_check_digit_ok(code):
+    """Verify the GS1 mod-10 check digit of an EAN-8, EAN-13 or GTIN-14 number."""
+    digits = [int(digit) for digit in code]
+    total = sum(digit * (3 if position % 2 == 0 else 1) for position, digit in enumerate(reversed(digits[:-1])))
+    return (10 - total % 10) % 10 == digits[-1]
+
+
+def validate_catalog(items):
+    """Check catalog rows for conflicts in a single pass before rendering.
+
+    Reported issue kinds:
+
+    - duplicate_row: a row identical to an earlier one (skipped, not an error)
+    - duplicate_sku: a SKU on several rows with different contents
+    - duplicate_barcode: one barcode number on several SKUs, so a scan is ambiguous
+    - filename_collision: different rows that would write the same label file,
+      or a barcode whose dash would make the SKU unrecoverable from the file name
+    - checksum: an EAN-8, EAN-13 or GTIN-14 number with a wrong check digit
+      (12-digit numbers are mostly in-store codes, so they are not checked)
+    - invalid_barcode: characters Code128 cannot encode
+
+    Args:
+        items (list): Catalog items; rows without a barcode are ignored
+
+    Returns:
+        tuple: (issues, duplicate_rows) where issues is a list of
+        (kind, row_num, message) and duplicate_rows the set of row numbers
+        identical to an earlier row
+    """
+    issues = []
+    duplicate_rows = set()
+    rows_by_sku = {}
+    sku_by_barcode = {}
+    row_by_filename = {}
+
+    for item in items:
+        if not item.barcode:
+            continue
+        content = (item.name, item.category, item.barcode, item.price)
+        first = rows_by_sku.get(item.sku)
+        if first is not None:
+            if first[1] == content:
+                duplicate_rows.add(item.row_num)
+                issues.append(('duplicate_row', item.row_num, f"{item.sku} repeats row {first[0]}"))
+                continue
+            issues.append(('duplicate_sku', item.row_num, f"{item.sku} is also on row {first[0]} with different details"))
+        else:
+            rows_by_sku[item.sku] = (item.row_num, content)
+
+        other_sku = sku_by_barcode.setdefault(item.barcode, item.sku)
+        if other_sku != item.sku:
+            issues.append(('duplicate_barcode', item.row_num, f"{item.barcode} of {item.sku} is also used by {other_sku}"))
+
+        file_name = clean_filename(f"{item.sku}-{item.barcode}")
+        other_row = row_by_filename.setdefault(file_name, item.row_num)
+        if other_row != item.row_num:
+            issues.append(('filename_collision', item.row_num, f"{file_name}.png is also written for row {other_row}"))
+        if '-' in item.barcode:
+            issues.append(('filename_collision', item.row_num, f"barcode {item.barcode} contains a dash, so its file name hides the SKU"))
+
+        if not item.barcode.isascii() or not item.barcode.isprintable():
+            issues.append(('invalid_barcode', item.row_num, f"{item.barcode!r} of {item.sku} has characters Code128 cannot encode"))
+        elif item.barcode.isdigit() and len(item.barcode) in (8, 13, 14) and not gs1_check_digit_ok(item.barcode):
+            issues.append(('checksum', item.row_num, f"{item.barcode} of {item.sku} has a wrong check digit"))
+
+    return issues, duplicate_rows
+
+
+def print_validation_report(issues, max_examples=10):
+    """Print validation issues grouped by kind, with a few example rows each."""
+    by_kind = {}
+    for kind, row_num, message in issues:
+        by_kind.setdefault(kind, []).append((row_num, message))
+    print("\nValidation")
+    print("----------")
+    if not by_kind:
+        print("No conflicts found.")
+        return
+    for kind, entries in sorted(by_kind.items()):
+        label = "error" if kind in VALIDATION_ERRORS else "info"
+        print(f"{kind} ({label}): {len(entries)}")
+        for row_num, message in entries[:max_examples]:
+            print(f"  Row {row_num}: {message}")
+        if len(entries) > max_examples:
+            print(f"  ... and {len(entries) - max_examples} more")
+
+
+def dedupe_label_jobs(jobs):
+    """Group jobs whose labels come out pixel-identical so each renders once.
+
+    A label depends on its template, barcode, price and name, not on the SKU
+    or category, so rows sharing those need only one render.
+
+    Returns:
+        tuple: (unique_jobs, copies) where copies maps id() of a job in
+        unique_jobs to the other jobs that reuse its output
+    """
+    first_by_key = {}
+    unique_jobs = []
+    copies = {}
+    for job in jobs:
+        key = (job.get('template', 'standard'), job['barcode_number'], job['price'], job['item_name'])
+        first = first_by_key.setdefault(key, job)
+        if first is job:
+            unique_jobs.append(job)
+        else:
+            copies.setdefault(id(first), []).append(job)
+    return unique_jobs, copies
+
+
+def plan_label_updates(jobs, manifest, exists=os.path.exists):
+    """Compare label jobs against the manifest.
+
+    The manifest maps each label path to ``{'sku': ..., 'hash': ...}``.
+
+    Args:
+        jobs (list): Keyword argument dicts for generate_barcode_image
+        manifest (dict): Manifest from the previous run
+        exists (callable): Tells whether a label path is present
+            (os.path.exists, or LabelStore.contains for a label store)
+
+    Returns:
+        tuple: (to_render, to_move, to_delete, unchanged) where to_render is a
+        list of jobs, to_move a list of (old_path, new_path) pairs, to_delete a
+        list of stale paths and unchanged the number of labels left as they are
+    """
+    wanted = {}
+    for job in jobs:
+        wanted[label_output_path(job)] = (job, label_content_hash(job))
+
+    # Stale entries whose content is still wanted elsewhere can be moved
+    stale_by_content = {}
+    for path, entry in manifest.items():
+        if path not in wanted and exists(path):
+            stale_by_content.setdefault((entry.get('sku'), entry.get('hash')), []).append(path)
+
+    to_render = []
+    to_move = []
+    unchanged = 0
+    for path, (job, content_hash) in wanted.items():
+        entry = manifest.get(path)
+        if entry and entry.get('hash') == content_hash and exists(path):
+            unchanged += 1
+            continue
+        candidates = stale_by_content.get((job['sku'], content_hash))
+        if candidates:
+            to_move.append((candidates.pop(), path))
+        else:
+            to_render.append(job)
+
+    to_delete = [path for paths in stale_by_content.values() for path in paths]
+    to_delete.extend(path for path in manifest if path not in wanted and not exists(path))
+    return to_render, to_move, to_delete, unchanged
+
+
+def render_label_job(job, to_memory=False):
+    """Render a single label job, capturing any error instead of raising.
+
+    Used as the unit of work for the process pool, so it must stay a
+    module-level function that only takes and returns picklable values.
+
+    Args:
+        job (dict): Keyword arguments for generate_barcode_image
+        to_memory (bool): Return the encoded label instead of writing the files
+
+    Returns:
+        tuple: (result, error, timings) where exactly one of result and error
+        is None; result is the final path, or the (png, thumbnail) bytes with
+        to_memory;
+        timings maps stage name to seconds when the default renderer is
+        profiling, otherwise it is None
+    """
+    timer = get_renderer(job.get('template', 'standard')).timer
+    timer.take()
+    start = time.perf_counter()
+    try:
+        if to_memory:
+            result = render_label_variants(job['barcode_number'], job['price'], job['item_name'],
+                                           job.get('template', 'standard'))
+        else:
+            result = generate_barcode_image(**job)
+        error = None
+    except Exception as e:
+        result, error = None, str(e)
+    timings = timer.take()
+    if timings is not None:
+        timings['total'] = time.perf_counter() - start
+    return result, error, timings
+
+
+def run_label_jobs(jobs, workers=1, to_memory=False):
+    """Render label jobs, optionally across a pool of worker processes.
+
+    Results are yielded in the same order as ``jobs`` regardless of the
+    number of workers, so the log output is deterministic.
+
+    Args:
+        jobs (list): Keyword argument dicts for generate_barcode_image
+        workers (int): Number of worker processes (1 renders in-process)
+        to_memory (bool): Yield (png, thumbnail) bytes instead of writing files
+
+    Yields:
+        tuple: (job, result, error, timings) for every job
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield (job,) + render_label_job(job, to_memory)
+        return
+
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=set_default_renderer,
+                             initargs=(get_default_renderer(),)) as executor:
+        for job, result in zip(jobs, executor.map(partial(render_label_job, to_memory=to_memory), jobs, chunksize=chunksize)):
+            yield (job,) + result
+
+
+def parse_args(argv=None):
+    """Parse command line options for the barcode generator."""
+    parser = argparse.ArgumentParser(description="Generate barcode labels from items.csv, organized by category.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes to render with (0 = one per CPU core, default: 1)")
+    parser.add_argument('--font',
+                        help="TrueType font for label text (default: $BARCODE_FONT or a system Arial/DejaVu Sans)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-render every label; labels of SKUs dropped from items.csv are still removed")
+    parser.add_argument('--profile', action='store_true',
+                        help="Time each pipeline stage and print a run summary with the slowest labels")
+    parser.add_argument('--template', action='append', choices=sorted(LABEL_TEMPLATES),
+                        help="Label template to render; repeat to render several in one run (default: standard)")
+    parser.add_argument('--strict', action='store_true',
+                        help="Stop before rendering if validation finds duplicate SKUs or barcodes, "
+                             "file name collisions or bad check digits")
+    parser.add_argument('--store',
+                        help="Write labels into this single-file label store instead of category folders of PNGs")
+    return parser.parse_args(argv)
+
+
+def print_run_summary(rendered, elapsed, stage_totals, slowest):
+    """Print throughput, time per pipeline stage and the slowest labels of a profiled run.
+
+    Args:
+        rendered (int): Number of labels rendered
+        elapsed (float): Wall-clock seconds spent rendering
+        stage_totals (dict): Stage name -> seconds summed over all labels
+        slowest (list): (seconds, sku, item_name) of the slowest labels
+    """
+    print("\nRun summary")
+    print("-----------")
+    if not rendered:
+        print("No labels rendered.")
+        return
+    print(f"Rendered {rendered} labels in {elapsed:.2f}s ({rendered / elapsed:.1f} labels/s)")
+    total = stage_totals.get('total') or sum(stage_totals.values()) or 1
+    for stage, seconds in sorted(stage_totals.items(), key=lambda entry: -entry[1]):
+        if stage == 'total':
+            continue
+        print(f"  {stage:<11} {seconds * 1000 / rendered:8.2f} ms/label  {seconds / total:6.1%}")
+    print("Slowest labels:")
+    for seconds, sku, item_name in slowest:
+        print(f"  {seconds * 1000:8.2f} ms  {sku} - {item_name}")
+
+
+def main(workers=1, force=False, font_path=None, profile=False, store_path=None, templates=None, strict=False):
+    """Main function to process items.csv and generate barcodes organized by category.
+
+    The catalog is validated first and rows identical to an earlier row are
+    dropped. Only labels whose row changed since the last run are rendered
+    again, and labels that would come out identical are rendered once and
+    copied; labels for dropped SKUs are deleted and labels whose category
+    changed are moved to the new folder. Every label gets a thumbnail for
+    the web app, including labels rendered before thumbnails existed.
+
+    Args:
+        workers (int): Number of worker processes to render with (0 = one per CPU core)
+        force (bool): Re-render every label, ignoring the manifest's hashes; labels
+            for SKUs no longer in the catalog are still removed
+        font_path (str): TrueType font for label text
+        profile (bool): Time each pipeline stage and print a run summary
+        store_path (str): Label store to write into instead of category folders;
+            the store keeps its own manifest
+        templates (list): Label templates to render, each into its own output
+            folder with its own manifest (default: ['standard'])
+        strict (bool): Stop before rendering if validation finds any errors
+    """
     csv_file = 'items.csv'
-    
-    # Column indices based on the CSV structure
-    SKU_INDEX = 1
-    NAME_INDEX = 2
-    CATEGORY_INDEX = 3
-    BARCODE_INDEX = 13
-    PRICE_INDEX = 18  # Price [Ant's Corner]
+    templates = templates or ['standard']
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if store_path and templates != ['standard']:
+        print("Error: a label store only holds standard labels; render other templates to folders.")
+        return
+    set_default_renderer(LabelRenderer(font_path=font_path, profile=profile))
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            # Skip header row
-            next(reader)
-            
-            processed_count = 0
-            skipped_count = 0
-            
-            for row_num, row in enumerate(reader, start=2):  # Start from 2 since we skipped header
-                # Ensure row has enough columns
-                if len(row) <= max(SKU_INDEX, NAME_INDEX, CATEGORY_INDEX, BARCODE_INDEX, PRICE_INDEX):
-                    print(f"Row {row_num}: Insufficient columns, skipping")
-                    skipped_count += 1
-                    continue
-                
-                # Extract data
-                sku = row[SKU_INDEX].strip() if len(row) > SKU_INDEX else ""
-                item_name = row[NAME_INDEX].strip() if len(row) > NAME_INDEX else ""
-                category = row[CATEGORY_INDEX].strip() if len(row) > CATEGORY_INDEX else "Uncategorized"
-                barcode_number = row[BARCODE_INDEX].strip() if len(row) > BARCODE_INDEX else ""
-                price = row[PRICE_INDEX].strip() if len(row) > PRICE_INDEX else ""
-                
-                # Skip if no barcode number
-                if not barcode_number:
-                    print(f"Row {row_num}: No barcode number for {sku} - {item_name}, skipping")
-                    skipped_count += 1
-                    continue
-                
-                # Clean category name for folder
-                folder_name = clean_filename(category) if category else "Uncategorized"
-                
-                try:
-                    generate_barcode_image(
-                        folder=folder_name,
-                        barcode_number=barcode_number,
-                        price=price,
-                        sku=sku,
-                        item_name=item_name
-                    )
-                    processed_count += 1
-                    
-                except Exception as e:
-                    print(f"Error generating barcode for {sku} - {item_name}: {str(e)}")
-                    skipped_count += 1
-            
-            print(f"\nCompleted! Processed: {processed_count}, Skipped: {skipped_count}")
-            
+        items = load_catalog(csv_file)
     except FileNotFoundError:
         print(f"Error: {csv_file} not found. Please ensure the file exists in the current directory.")
+        return
     except Exception as e:
         print(f"Error reading CSV file: {str(e)}")
+        return
+    
+    issues, duplicate_rows = validate_catalog(items)
+    print_validation_report(issues)
+    error_count = sum(1 for kind, _, _ in issues if kind in VALIDATION_ERRORS)
+    if strict and error_count:
+        print(f"\nStopped before rendering: {error_count} validation errors (run without --strict to render anyway)")
+        return
+    
+    processed_count = 0
+    skipped_count = 0
+    jobs = []
+    
+    for item in items:
+        # Skip if no barcode number
+        if not item.barcode:
+            print(f"Row {item.row_num}: No barcode number for {item.sku} - {item.name}, skipping")
+            skipped_count += 1
+            continue
+        
+        # Already reported by the validation pass
+        if item.row_num in duplicate_rows:
+            skipped_count += 1
+            continue
+        
+        # Clean category name for folder
+        folder_name = clean_filename(item.category) if item.category else "Uncategorized"
+        
+        for template in templates:
+            output_dir = get_label_template(template)['output_dir']
+            jobs.append({
+                'folder': folder_name if output_dir == '.' else os.path.join(output_dir, folder_name),
+                'barcode_number': item.barcode,
+                'price': item.price,
+                'sku': item.sku,
+                'item_name': item.name,
+                'template': template,
+            })
+    
+    try:
+        store = LabelStore(store_path) if store_path else None
+    except sqlite3.Error as e:
+        print(f"Error opening label store {store_path}: {e}")
+        return
+    exists = store.contains if store else os.path.exists
+    to_render = []
+    unchanged_count = 0
+    # Template name -> (manifest path, manifest after this run)
+    manifests = {}
+    for template in templates:
+        manifest_path = os.path.join(get_label_template(template)['output_dir'], MANIFEST_FILE)
+        manifest = store.manifest() if store else load_manifest(manifest_path)
+        if force:
+            # Keep the paths so labels for dropped SKUs are still removed
+            manifest = {path: {'sku': entry.get('sku'), 'hash': None} for path, entry in manifest.items()}
+        template_jobs = [job for job in jobs if job['template'] == template]
+        template_render, to_move, to_delete, unchanged = plan_label_updates(template_jobs, manifest, exists=exists)
+        new_manifest = {path: entry for path, entry in manifest.items() if exists(path)}
+        manifests[template] = (manifest_path, new_manifest)
+        to_render.extend(template_render)
+        unchanged_count += unchanged
+        
+        for path in to_delete:
+            if exists(path):
+                if store:
+                    store.delete(path)
+                else:
+                    remove_label_file(path)
+                print(f"Removed stale barcode: {path}")
+            new_manifest.pop(path, None)
+        
+        for old_path, new_path in to_move:
+            if store:
+                store.move(old_path, new_path)
+            else:
+                move_label_file(old_path, new_path)
+            print(f"Moved barcode: {old_path} -> {new_path}")
+            new_manifest[new_path] = new_manifest.pop(old_path)
+            processed_count += 1
+    
+    render_jobs, copies = dedupe_label_jobs(to_render)
+    if copies:
+        print(f"{len(to_render) - len(render_jobs)} labels are identical to another label and will be copied")
+    if workers > 1 and render_jobs:
+        print(f"Rendering {len(render_jobs)} labels with {workers} workers")
+    
+    stage_totals = {}
+    slowest = []
+    render_start = time.perf_counter()
+    with store.batch() if store else contextlib.nullcontext():
+        for job, result, error, timings in run_label_jobs(render_jobs, workers=workers, to_memory=store is not None):
+            if timings:
+                for stage, seconds in timings.items():
+                    stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+                heapq.heappush(slowest, (timings['total'], job['sku'], job['item_name']))
+                if len(slowest) > 5:
+                    heapq.heappop(slowest)
+            for target in [job] + copies.get(id(job), []):
+                new_manifest = manifests[target['template']][1]
+                if error is not None:
+                    print(f"Error generating barcode for {target['sku']} - {target['item_name']}: {error}")
+                    new_manifest.pop(label_output_path(target), None)
+                    skipped_count += 1
+                    continue
+                content_hash = label_content_hash(target)
+                if store:
+                    final_path = label_output_path(target)
+                    png, thumbnail = result
+                    store.put(final_path, target['sku'], png, content_hash)
+                    store.put_thumbnail(final_path, thumbnail)
+                elif target is job:
+                    final_path = result
+                else:
+                    final_path = label_output_path(target)
+                    os.makedirs(target['folder'], exist_ok=True)
+                    shutil.copyfile(result, final_path)
+                    os.makedirs(os.path.dirname(label_thumbnail_path(final_path)), exist_ok=True)
+                    shutil.copyfile(label_thumbnail_path(result), label_thumbnail_path(final_path))
+                print(f"Generated barcode: {final_path}")
+                new_manifest[final_path] = {'sku': target['sku'], 'hash': content_hash}
+                processed_count += 1
+    
+        backfilled = backfill_thumbnails(
+            [path for _, new_manifest in manifests.values() for path in new_manifest], store=store)
+        if backfilled:
+            print(f"Created {backfilled} missing thumbnails")
+    
+    if profile:
+        print_run_summary(len(render_jobs), time.perf_counter() - render_start, stage_totals, sorted(slowest, reverse=True))
+    
+    if not store:
+        for manifest_path, new_manifest in manifests.values():
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            save_manifest(new_manifest, manifest_path)
+    print(f"\nCompleted! Processed: {processed_count}, Unchanged: {unchanged_count}, Skipped: {skipped_count}")
+        
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(workers=args.workers, force=args.force, font_path=args.font, profile=args.profile, store_path=args.store,
+         templates=args.template, strict=args.strict)
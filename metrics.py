@@ -0,0 +1,79 @@
+"""Lightweight timing helpers shared by the batch tools and the web app."""
+import bisect
+import contextlib
+import threading
+import time
+
+
+class StageTimer:
+    """Accumulates wall-clock time per named pipeline stage."""
+
+    enabled = True
+
+    def __init__(self):
+        self.totals = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
+
+    def take(self):
+        """Return the accumulated totals and start over."""
+        totals, self.totals = self.totals, {}
+        return totals
+
+
+class NullTimer:
+    """Stand-in for StageTimer when instrumentation is off."""
+
+    enabled = False
+    _context = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def take(self):
+        return None
+
+
+NULL_TIMER = NullTimer()
+
+
+class LatencyHistogram:
+    """Thread-safe cumulative latency histogram in milliseconds."""
+
+    bounds_ms = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    def __init__(self):
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._buckets = [0] * (len(self.bounds_ms) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, ms):
+        position = bisect.bisect_left(self.bounds_ms, ms)
+        with self._lock:
+            self.count += 1
+            self.sum_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            self._buckets[position] += 1
+
+    def snapshot(self):
+        """Return the histogram as a JSON-friendly dict of cumulative bucket counts."""
+        with self._lock:
+            buckets = {}
+            running = 0
+            for bound, count in zip(self.bounds_ms + ('+Inf',), self._buckets):
+                running += count
+                buckets[f"le_{bound}"] = running
+            return {
+                'count': self.count,
+                'mean_ms': round(self.sum_ms / self.count, 3) if self.count else None,
+                'max_ms': round(self.max_ms, 3),
+                'buckets': buckets,
+            }
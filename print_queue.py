@@ -0,0 +1,176 @@
+"""Server-side print queue for barcode labels.
+
+Requests only add SKUs and quantities to the queue; a background worker
+collects everything queued within a short window, imposes it onto one PDF
+sheet run with create_print_sheets and hands that PDF to a print backend.
+"""
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from create_print_sheets import create_barcode_sheets_streaming
+
+
+class LpPrintBackend:
+    """Print through CUPS with the `lp` command."""
+
+    name = 'lp'
+
+    def __init__(self, printer=None):
+        self.printer = printer
+
+    def print_file(self, pdf_path):
+        command = ['lp']
+        if self.printer:
+            command += ['-d', self.printer]
+        # Labels are sized in mm; scaling to the page would distort them
+        command += ['-o', 'fit-to-page=false', pdf_path]
+        subprocess.run(command, check=True, capture_output=True)
+
+
+class PreviewPrintBackend:
+    """Open the sheet in macOS Preview so it can be printed from there."""
+
+    name = 'preview'
+
+    def print_file(self, pdf_path):
+        subprocess.run(['open', '-a', 'Preview', pdf_path], check=True)
+
+
+class FileDropPrintBackend:
+    """Copy each sheet into a folder instead of printing (testing, hot folders)."""
+
+    name = 'file'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._sequence = itertools.count(1)
+
+    def print_file(self, pdf_path):
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = time.strftime('labels-%Y%m%d-%H%M%S') + f'-{next(self._sequence)}.pdf'
+        shutil.copy(pdf_path, os.path.join(self.directory, file_name))
+
+
+def backend_from_env():
+    """Pick the print backend from BARCODE_PRINT_BACKEND.
+
+    Accepted values are 'lp' or 'lp:<printer>', 'preview' and 'file:<directory>'.
+    Defaults to Preview on macOS and CUPS elsewhere.
+    """
+    setting = os.environ.get('BARCODE_PRINT_BACKEND', '').strip()
+    if not setting:
+        setting = 'preview' if sys.platform == 'darwin' else 'lp'
+
+    kind, _, argument = setting.partition(':')
+    if kind == 'lp':
+        return LpPrintBackend(argument or None)
+    if kind == 'preview':
+        return PreviewPrintBackend()
+    if kind == 'file':
+        return FileDropPrintBackend(argument or 'printed_sheets')
+    raise ValueError(f"Unknown BARCODE_PRINT_BACKEND: {setting}")
+
+
+class PrintQueue:
+    """Collects label print requests and prints them in batches.
+
+    Args:
+        backend: Object with a print_file(pdf_path) method
+        label_source (callable): Maps a SKU to a (key, source) pair accepted by
+            create_barcode_sheets_streaming, or None if the SKU has no label
+        coalesce_seconds (float): How long the worker waits after the first
+            request so labels queued in quick succession share a sheet
+    """
+
+    max_history = 20
+
+    def __init__(self, backend, label_source, coalesce_seconds=2.0):
+        self.backend = backend
+        self.label_source = label_source
+        self.coalesce_seconds = coalesce_seconds
+        self._pending = OrderedDict()
+        self._history = []
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def add(self, sku, quantity=1):
+        """Queue quantity labels for sku; returns the number now pending for it."""
+        if quantity < 1:
+            raise ValueError("quantity must be at least 1")
+        with self._condition:
+            self._pending[sku] = self._pending.get(sku, 0) + quantity
+            self._start_worker()
+            self._condition.notify()
+            return self._pending[sku]
+
+    def status(self):
+        """Return the pending labels and the outcome of recent batches."""
+        with self._condition:
+            return {
+                'backend': self.backend.name,
+                'pending': [{'sku': sku, 'quantity': quantity} for sku, quantity in self._pending.items()],
+                'batches': list(self._history),
+            }
+
+    def _start_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='print-queue', daemon=True)
+            self._worker.start()
+
+    def _take_batch(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+        # Let labels queued right after the first one join the same sheet
+        time.sleep(self.coalesce_seconds)
+        with self._condition:
+            batch = list(self._pending.items())
+            self._pending.clear()
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            started = time.time()
+            result = {'started': started, 'skus': len(batch), 'labels': 0, 'error': None}
+            try:
+                result['labels'] = self.print_batch(batch)
+            except Exception as e:
+                result['error'] = str(e)
+            result['seconds'] = round(time.time() - started, 3)
+            with self._condition:
+                self._history.append(result)
+                del self._history[:-self.max_history]
+
+    def print_batch(self, batch):
+        """Impose a batch of (sku, quantity) pairs onto one PDF and print it.
+
+        Returns:
+            int: Number of labels printed
+        """
+        def labels():
+            for sku, quantity in batch:
+                label = self.label_source(sku)
+                if label is None:
+                    continue
+                for _ in range(quantity):
+                    yield label
+
+        fd, pdf_path = tempfile.mkstemp(prefix='labels-', suffix='.pdf')
+        os.close(fd)
+        try:
+            placed = create_barcode_sheets_streaming(labels(), pdf_path)
+            if placed:
+                self.backend.print_file(pdf_path)
+            return placed
+        finally:
+            # Preview opens the file asynchronously, so keep it around for it
+            if not isinstance(self.backend, PreviewPrintBackend):
+                os.remove(pdf_path)
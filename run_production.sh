@@ -0,0 +1,12 @@
+#!/bin/zsh
+# Script to serve the Flask app with several gunicorn workers (see gunicorn.conf.py)
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+cd "$SCRIPT_DIR"
+
+if command -v pipenv >/dev/null 2>&1; then
+	pipenv run gunicorn -c gunicorn.conf.py wsgi:application
+elif [ -x "$SCRIPT_DIR/install/bin/gunicorn" ]; then
+	"$SCRIPT_DIR/install/bin/gunicorn" -c gunicorn.conf.py wsgi:application
+else
+	gunicorn -c gunicorn.conf.py wsgi:application
+fi
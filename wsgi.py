@@ -0,0 +1,9 @@
+"""WSGI entry point for serving the barcode finder with several worker processes.
+
+Run it with the settings in gunicorn.conf.py:
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+`python app.py` remains the single-process development server.
+"""
+from app import app as application